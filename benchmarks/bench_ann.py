@@ -0,0 +1,67 @@
+"""Incremental graph updates scored against an approximate shortlist.
+
+    python benchmarks/bench_ann.py --movies 2000 5000 --shortlist 100 200
+
+A graph of --movies movies is built, then --new further movies are added and
+scored either against every movie (exact) or against their nearest movies
+from the vector index (ann_shortlist). Recall is the share of the exact top_k
+edges of the new movies that the shortlisted build also finds.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_similarity import synthetic_movies
+from movie_suggestions.data_structures import MovieSimilarityGraph
+
+
+def update(movies, count, top_k, shortlist):
+    graph = MovieSimilarityGraph(top_k=top_k, ann_shortlist=shortlist)
+    for movie in movies[:count]:
+        graph.add_movie(**movie)
+    graph.build_graph()
+    for movie in movies[count:]:
+        graph.add_movie(**movie)
+    # Both paths share the plot index update; keep it out of the timing.
+    graph._update_plot_index()
+    start = time.perf_counter()
+    graph.build_graph()
+    return graph, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, nargs="+", default=[2000, 5000])
+    parser.add_argument("--new", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--shortlist", type=int, nargs="+", default=[100, 200])
+    args = parser.parse_args()
+
+    for count in args.movies:
+        movies = synthetic_movies(count + args.new)
+        new_ids = [movie["movie_id"] for movie in movies[count:]]
+        exact, exact_time = update(movies, count, args.top_k, None)
+        print(f"{count:>6} movies  exact            {exact_time * 1000:9.1f} ms")
+
+        for shortlist in args.shortlist:
+            graph, elapsed = update(movies, count, args.top_k, shortlist)
+            found = sum(len(set(graph.graph[m]) & set(exact.graph[m])) for m in new_ids)
+            total = sum(len(exact.graph[m]) for m in new_ids)
+
+            index = graph._movie_vectors()
+            start = time.perf_counter()
+            for movie_id in new_ids:
+                index.nearest(movie_id, shortlist)
+            query_time = (time.perf_counter() - start) / len(new_ids)
+
+            print(f"{count:>6} movies  shortlist {shortlist:>5}  {elapsed * 1000:9.1f} ms  "
+                  f"speedup {exact_time / elapsed:5.1f}x  recall {found / max(total, 1):.2f}  "
+                  f"query {query_time * 1e6:6.0f} us")
+
+
+if __name__ == "__main__":
+    main()
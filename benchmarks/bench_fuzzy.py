@@ -0,0 +1,85 @@
+"""Latency of typo-tolerant RadixTrie search against a brute-force scan.
+
+    python benchmarks/bench_fuzzy.py --names 5000 20000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_trie import synthetic_names
+from movie_suggestions.data_structures import RadixTrie
+
+
+def misspell(text, rng):
+    position = rng.randrange(len(text))
+    edit = rng.choice(("substitute", "delete", "insert", "transpose"))
+    if edit == "substitute":
+        return text[:position] + rng.choice(string.ascii_lowercase) + text[position + 1:]
+    if edit == "delete":
+        return text[:position] + text[position + 1:]
+    if edit == "insert":
+        return text[:position] + rng.choice(string.ascii_lowercase) + text[position:]
+    if position + 1 < len(text):
+        return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+    return text
+
+
+def prefix_distance(query, word, max_distance):
+    # Smallest edit distance between query and any prefix of word; longer
+    # prefixes cannot come within max_distance.
+    previous, row = None, list(range(len(query) + 1))
+    best = row[-1]
+    for i, char in enumerate(word[:len(query) + max_distance], 1):
+        current = [i]
+        for j in range(1, len(query) + 1):
+            cost = 0 if query[j - 1] == char else 1
+            distance = min(current[j - 1] + 1, row[j] + 1, row[j - 1] + cost)
+            if previous is not None and j > 1 and query[j - 1] == word[i - 2] and query[j - 2] == char:
+                distance = min(distance, previous[j - 2] + 1)
+            current.append(distance)
+        previous, row = row, current
+        best = min(best, row[-1])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    for count in args.names:
+        names = synthetic_names(count)
+        trie = RadixTrie()
+        for name, score in names:
+            trie.insert(name, score)
+
+        rng = random.Random(1)
+        for length in (4, 8, 12):
+            queries = [misspell(name[:length], rng) for name, _ in rng.sample(names, args.queries)]
+            for max_distance in (1, 2):
+                start = time.perf_counter()
+                for query in queries:
+                    trie.fuzzy_search(query, max_distance, args.limit)
+                trie_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+                sample = queries[:5]
+                start = time.perf_counter()
+                for query in sample:
+                    matches = [(name, score) for name, score in names
+                               if prefix_distance(query, name, max_distance) <= max_distance]
+                    matches.sort(key=lambda item: -item[1])
+                scan_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+                print(f"{count:>6} names  query len {length:>2}  k={max_distance}  "
+                      f"trie {trie_us:9.1f} us/query  scan {scan_us:11.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Import cost of the web entry points, from `python -X importtime`.
+
+    python benchmarks/bench_imports.py --top 10
+
+Reports the cumulative import time of each module below, the heaviest modules
+it pulled in, and which of the heavy optional dependencies were loaded. The
+last line times loading those dependencies later, on the first recommendation.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ('myproject.views', 'movie_suggestions.fetch_actors', 'movie_suggestions.data_structures')
+HEAVY = ('numpy', 'scipy', 'sklearn', 'nltk')
+
+SETUP = """
+import os, sys
+sys.path.insert(0, {root!r})
+from django.conf import settings
+if not os.environ.get('DJANGO_SETTINGS_MODULE'):
+    settings.configure(TMDB_API_KEY='', TMDB_BASE_URL='http://127.0.0.1:9/3', TMDB_RETRIES=0)
+import django
+django.setup()
+"""
+
+IMPORT = SETUP + """
+import {module}
+print(' '.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+FIRST_USE = SETUP + """
+import time
+import myproject.views
+start = time.perf_counter()
+from movie_suggestions.data_structures import MovieSimilarityGraph
+MovieSimilarityGraph().calculate_plot_similarity('a ship lost at sea', 'a ship found at sea')
+import movie_suggestions.similarity_engine, nltk.stem
+print(time.perf_counter() - start)
+"""
+
+
+def import_times(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         IMPORT.format(root=ROOT, module=module, heavy=HEAVY)],
+        capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time:  self [us] | cumulative | <indent>name"
+    # and come in post-order, so a module's imports are the deeper-indented
+    # lines directly above its own.
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative)))
+
+    position = next(i for i, (_, name, _) in enumerate(entries) if name == module)
+    depth, _, total = entries[position]
+    children = {}
+    for indent, name, cumulative in reversed(entries[:position]):
+        if indent <= depth:
+            break
+        children[name] = cumulative
+    return total, children, result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        total, children, heavy = import_times(module)
+        print(f"{module:<36} {total / 1000:8.1f} ms  "
+              f"heavy deps loaded: {', '.join(heavy) or 'none'}")
+        heaviest = sorted((t, name) for name, t in children.items())
+        for cumulative, name in reversed(heaviest[-args.top:]):
+            print(f"    {name:<48} {cumulative / 1000:8.1f} ms")
+
+    first_use = float(subprocess.run(
+        [sys.executable, '-c', FIRST_USE.format(root=ROOT)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()[-1])
+    print(f"deferred to the first recommendation: {first_use * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
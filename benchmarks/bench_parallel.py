@@ -0,0 +1,63 @@
+"""Scaling of the multi-process vectorized graph build with worker count.
+
+    python benchmarks/bench_parallel.py --movies 2000 5000 --workers 1 2 4 8
+
+Each build also checks that the adjacency matches the single-process result.
+Speedups are bounded by the number of cores available (os.cpu_count()).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_similarity import synthetic_movies
+from movie_suggestions.data_structures import MovieSimilarityGraph
+from movie_suggestions.parallel_scoring import get_executor
+
+
+def build(movies, workers, top_k):
+    graph = MovieSimilarityGraph(top_k=top_k, workers=workers)
+    graph.PARALLEL_MIN_MOVIES = 0
+    for movie in movies:
+        graph.add_movie(**movie)
+    start = time.perf_counter()
+    graph.build_graph()
+    return graph, time.perf_counter() - start
+
+
+def neighbour_sets(graph):
+    return {movie_id: set(edges) for movie_id, edges in graph.graph.items() if edges}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, nargs="+", default=[2000, 5000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--top-k", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores available")
+    for workers in args.workers:
+        if workers > 1:
+            # Start the pools up front; their start-up is paid once per process.
+            list(get_executor(workers).map(abs, range(workers)))
+
+    for count in args.movies:
+        movies = synthetic_movies(count)
+        baseline, baseline_time = build(movies, None, args.top_k)
+        expected = neighbour_sets(baseline)
+        for workers in args.workers:
+            if workers == 1:
+                elapsed, same = baseline_time, True
+            else:
+                graph, elapsed = build(movies, workers, args.top_k)
+                same = neighbour_sets(graph) == expected
+            print(f"{count:>6} movies  {workers:>2} workers  {elapsed * 1000:9.1f} ms  "
+                  f"speedup {baseline_time / elapsed:5.2f}x  same neighbours: {same}")
+
+
+if __name__ == "__main__":
+    main()
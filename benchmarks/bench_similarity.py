@@ -0,0 +1,76 @@
+"""Compare the scalar and vectorized similarity engines of MovieSimilarityGraph.
+
+    python benchmarks/bench_similarity.py --movies 50 200 400
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from movie_suggestions.data_structures import MovieSimilarityGraph
+
+WORDS = (
+    "space alien war love family murder detective ship ocean king queen robot "
+    "future past dream city heist revenge prison island school music friendship "
+    "magic dragon zombie vampire spy police desert storm journey secret"
+).split()
+
+
+def synthetic_movies(count, seed=0):
+    rng = random.Random(seed)
+    genres = list(MovieSimilarityGraph().genre_hierarchy)
+    actors = [f"Actor {i}" for i in range(count * 2)]
+    directors = [f"Director {i}" for i in range(count // 4 + 1)] + ["Unknown Director"]
+    movies = []
+    for movie_id in range(1, count + 1):
+        year = rng.randint(1970, 2024)
+        movies.append(dict(
+            movie_id=movie_id,
+            title=f"Movie {movie_id}",
+            genres=rng.sample(genres, rng.randint(1, 3)),
+            cast=rng.sample(actors, 5),
+            director=rng.choice(directors),
+            year=year,
+            rating=round(rng.uniform(3, 9), 1),
+            popularity=rng.uniform(0, 150),
+            keywords=rng.sample(WORDS, rng.randint(0, 6)),
+            runtime=rng.choice([None, rng.randint(80, 180)]),
+            synopsis=" ".join(rng.choices(WORDS, k=25)) if rng.random() > 0.2 else None,
+            release_date=f"{year}-01-01",
+        ))
+    return movies
+
+
+def build(engine, movies):
+    graph = MovieSimilarityGraph(engine=engine)
+    for movie in movies:
+        graph.add_movie(**movie)
+    start = time.perf_counter()
+    graph.build_graph()
+    return graph, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, nargs="+", default=[50, 200])
+    args = parser.parse_args()
+
+    for count in args.movies:
+        movies = synthetic_movies(count)
+        scalar, scalar_time = build("scalar", movies)
+        vectorized, vector_time = build("vectorized", movies)
+        max_diff = max(
+            (abs(weight - vectorized.graph[a][b])
+             for a, edges in scalar.graph.items() for b, weight in edges.items()),
+            default=0.0,
+        )
+        print(f"{count:>5} movies  scalar {scalar_time * 1000:9.1f} ms  "
+              f"vectorized {vector_time * 1000:8.1f} ms  "
+              f"speedup {scalar_time / max(vector_time, 1e-9):6.1f}x  max |diff| {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Actor index startup cost: snapshot load against rebuilding from the cached
+blob, and time to the first actor autocomplete response in a fresh process.
+
+    python benchmarks/bench_startup.py --actors 2000 20000
+
+TMDB is pointed at an unreachable address, so the cold start shows the
+request being answered while the warm-up runs in the background.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = """
+import os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from django.conf import settings
+if not os.environ.get('DJANGO_SETTINGS_MODULE'):
+    settings.configure(TMDB_API_KEY='', TMDB_BASE_URL='http://127.0.0.1:9/3', TMDB_RETRIES=0)
+import django
+django.setup()
+"""
+
+FIRST_REQUEST = SETUP + """
+from django.test import RequestFactory
+from myproject import views
+response = views.GetActorAutocomplete().get(RequestFactory().get('/', {{'query': 'ja'}}))
+elapsed = time.perf_counter() - start
+import json
+print(elapsed, len(json.loads(response.content)['suggestions']))
+os._exit(0)
+"""
+
+
+def child_env(snapshot_path, checkpoint_path):
+    env = dict(os.environ, KINOLOGIKA_SNAPSHOT_PATH=snapshot_path,
+               KINOLOGIKA_CRAWL_CHECKPOINT=checkpoint_path, KINOLOGIKA_CACHE_BACKEND='memory')
+    env.pop('DJANGO_SETTINGS_MODULE', None)
+    return env
+
+
+def first_request(snapshot_path, checkpoint_path):
+    output = subprocess.run(
+        [sys.executable, '-c', FIRST_REQUEST.format(root=ROOT)],
+        env=child_env(snapshot_path, checkpoint_path), capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[-2]), int(output[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actors', type=int, nargs='+', default=[2000, 20000])
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+    from django.conf import settings
+    settings.configure(TMDB_API_KEY='', TMDB_BASE_URL='http://127.0.0.1:9/3', TMDB_RETRIES=0)
+    workdir = tempfile.mkdtemp()
+    os.environ['KINOLOGIKA_SNAPSHOT_PATH'] = os.path.join(workdir, 'unused.bin')
+    os.environ['KINOLOGIKA_CRAWL_CHECKPOINT'] = os.path.join(workdir, 'unused.json')
+
+    from bench_trie import synthetic_names
+    from movie_suggestions.data_structures import SearchIndex, movie_trie
+    from movie_suggestions.fetch_actors import ActorRecord
+    from movie_suggestions.snapshot import encode_snapshot, read_snapshot, write_snapshot
+
+    checkpoint_path = os.path.join(workdir, 'crawl.json')
+    cold_seconds, _ = first_request(os.path.join(workdir, 'missing.bin'), checkpoint_path)
+    print(f"{'cold (no snapshot)':>24}  first request after {cold_seconds * 1000:8.1f} ms")
+
+    for count in args.actors:
+        names = synthetic_names(count)
+        index = SearchIndex()
+        records = {}
+        for actor_id, (name, popularity) in enumerate(names):
+            index.add(actor_id, name.title(), popularity)
+            records[actor_id] = ActorRecord(actor_id, name.title(), popularity, ('Some Movie',))
+        entries = index.entries()
+
+        snapshot_path = os.path.join(workdir, f'snapshot_{count}.bin')
+        data = encode_snapshot({
+            'actor_index': index, 'actor_records': records, 'actor_movies': {},
+            'actor_details': {}, 'movie_trie': movie_trie, 'created': time.time(),
+        })
+        write_snapshot(snapshot_path, data)
+
+        start = time.perf_counter()
+        read_snapshot(snapshot_path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        rebuilt = SearchIndex()
+        for entry in entries:
+            rebuilt.add(*entry)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        seconds, suggestions = first_request(snapshot_path, checkpoint_path)
+        print(f"{count:>8} actors snapshot  {len(data) / 1024:8.0f} KiB  load {load_ms:7.1f} ms  "
+              f"blob rebuild {rebuild_ms:8.1f} ms  first request after {seconds * 1000:8.1f} ms "
+              f"({suggestions} suggestions)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Memory per name and prefix-search latency of Trie against RadixTrie.
+
+    python benchmarks/bench_trie.py --names 5000 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from movie_suggestions.data_structures import RadixTrie, Trie
+
+FIRST = (
+    "james mary robert patricia john jennifer michael linda david elizabeth william barbara "
+    "richard susan joseph jessica thomas sarah charles karen christopher lisa daniel nancy "
+    "matthew betty anthony margaret mark sandra donald ashley steven kimberly paul emily "
+    "andrew donna joshua michelle kenneth carol kevin amanda brian melissa george deborah"
+).split()
+LAST = (
+    "smith johnson williams brown jones garcia miller davis rodriguez martinez hernandez "
+    "lopez gonzalez wilson anderson thomas taylor moore jackson martin lee perez thompson "
+    "white harris sanchez clark ramirez lewis robinson walker young allen king wright scott "
+    "torres nguyen hill flores green adams nelson baker hall rivera campbell mitchell carter"
+).split()
+
+
+def synthetic_names(count, seed=0):
+    rng = random.Random(seed)
+    names = {}
+    while len(names) < count:
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        if rng.random() < 0.7:
+            name += f" {rng.choice(LAST)}{rng.randint(0, 999)}"
+        names[name] = rng.uniform(0, 100)
+    return list(names.items())
+
+
+def measure(trie_class, names, prefixes, limit):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    trie = trie_class()
+    for name, score in names:
+        trie.insert(name, score)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for prefix in prefixes:
+        trie.search_prefix(prefix, limit=limit)
+    elapsed = time.perf_counter() - start
+    return used / len(names), elapsed / len(prefixes) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    for count in args.names:
+        names = synthetic_names(count)
+        rng = random.Random(1)
+        prefixes = [name[:rng.randint(1, 6)] for name, _ in rng.sample(names, min(2000, count))]
+        for trie_class in (Trie, RadixTrie):
+            per_name, latency = measure(trie_class, names, prefixes, args.limit)
+            print(f"{count:>6} names  {trie_class.__name__:<9}  {per_name:8.0f} B/name  "
+                  f"{latency:7.2f} us/lookup (limit={args.limit})")
+
+
+if __name__ == "__main__":
+    main()
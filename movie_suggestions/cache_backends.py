@@ -0,0 +1,302 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from movie_suggestions.concurrency import BackgroundRefresher, cache_refresher
+
+logger = logging.getLogger(__name__)
+
+def project_file(name: str) -> str:
+    # Default location of the local data files: the project directory.
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), name)
+
+
+def sqlite_connection(path: str, local: threading.local) -> sqlite3.Connection:
+    # One connection per thread, kept in `local`. WAL lets the other worker
+    # processes read while one writes.
+    connection = getattr(local, 'connection', None)
+    if connection is None:
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        local.connection = connection
+    return connection
+
+
+DEFAULT_SQLITE_PATH = project_file('kinologika_cache.sqlite3')
+
+
+class CacheBackend:
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def remove(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def get_or_refresh(self, key: str, refresh: Callable[..., Any], *args) -> Optional[Any]:
+        # Only RefreshingCache serves stale entries; elsewhere an entry is
+        # either fresh or gone, so there is never anything to refresh.
+        return self.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class SQLiteCache(CacheBackend):
+    # A file-backed store that every worker process on the host opens, so
+    # cached TMDB data is shared between workers and survives restarts.
+    PURGE_EVERY = 500
+
+    def __init__(self, namespace: str, ttl: int = 3600, capacity: Optional[int] = None,
+                 path: str = DEFAULT_SQLITE_PATH):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.capacity = capacity
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.puts = 0
+
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,'
+            ' written REAL NOT NULL, expires REAL NOT NULL,'
+            ' PRIMARY KEY (namespace, key))'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (namespace, expires)')
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_written ON cache (namespace, written)')
+
+    def _connection(self) -> sqlite3.Connection:
+        return sqlite_connection(self.path, self.local)
+
+    def _count(self, **counters: int):
+        with self.lock:
+            for name, amount in counters.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache WHERE namespace = ? AND key = ?',
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            self._count(misses=1)
+            return None
+
+        value, expires = row
+        if expires < time.time():
+            self.remove(key)
+            self._count(misses=1, expirations=1)
+            return None
+
+        try:
+            result = pickle.loads(value)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {self.namespace}/{key}: {e}")
+            self.remove(key)
+            self._count(misses=1)
+            return None
+        self._count(hits=1)
+        return result
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache (namespace, key, value, written, expires)'
+            ' VALUES (?, ?, ?, ?, ?)',
+            (self.namespace, key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now, now + self.ttl),
+        )
+
+        self._count(puts=1)
+        if self.puts % self.PURGE_EVERY == 0:
+            self._purge(connection, now)
+
+    def _purge(self, connection: sqlite3.Connection, now: float):
+        expired = connection.execute(
+            'DELETE FROM cache WHERE namespace = ? AND expires < ?', (self.namespace, now)
+        ).rowcount
+        self._count(expirations=max(expired, 0))
+
+        if self.capacity is not None:
+            connection.execute(
+                'DELETE FROM cache WHERE namespace = ? AND key IN ('
+                ' SELECT key FROM cache WHERE namespace = ? ORDER BY written DESC LIMIT -1 OFFSET ?)',
+                (self.namespace, self.namespace, self.capacity),
+            )
+
+    def remove(self, key: str) -> None:
+        self._connection().execute(
+            'DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key)
+        )
+
+    def clear(self) -> None:
+        self._connection().execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._connection().execute(
+            'SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': size,
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class DjangoCache(CacheBackend):
+    # Delegates to one of Django's configured caches (e.g. Redis or
+    # memcached) so that data can be shared beyond a single host.
+    def __init__(self, namespace: str, ttl: int = 3600, alias: str = 'default'):
+        from django.core.cache import caches
+
+        self.namespace = namespace
+        self.ttl = ttl
+        self.cache = caches[alias]
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        # Hashed so keys containing spaces (actor names, queries) stay valid
+        # for memcached.
+        return f"kinologika:{self.namespace}:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.cache.get(self._key(key))
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.cache.set(self._key(key), value, timeout=self.ttl)
+
+    def remove(self, key: str) -> None:
+        self.cache.delete(self._key(key))
+
+    def clear(self) -> None:
+        # Django caches cannot drop a single namespace; entries age out.
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class TieredCache(CacheBackend):
+    # The in-process LRU answers hot keys; misses fall through to the shared
+    # store and are copied back into the front tier.
+    def __init__(self, front: CacheBackend, back: CacheBackend):
+        self.front = front
+        self.back = back
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.front.get(key)
+        if value is not None:
+            return value
+        value = self.back.get(key)
+        if value is not None:
+            self.front.put(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.front.put(key, value)
+        self.back.put(key, value)
+
+    def remove(self, key: str) -> None:
+        self.front.remove(key)
+        self.back.remove(key)
+
+    def clear(self) -> None:
+        self.front.clear()
+        self.back.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'front': self.front.stats(), 'back': self.back.stats()}
+
+
+class StampedValue(NamedTuple):
+    written: float
+    value: Any
+
+
+class RefreshingCache(CacheBackend):
+    # Stale-while-revalidate over another backend, whose own TTL is the hard
+    # limit. Past soft_ttl, get treats an entry as a miss, while get_or_refresh
+    # still returns it at once but schedules refresh(*args) in the background;
+    # refresh is expected to put the new value, as the loaders that fill these
+    # caches already do.
+    def __init__(self, backend: CacheBackend, soft_ttl: float,
+                 refresher: BackgroundRefresher = cache_refresher):
+        self.backend = backend
+        self.soft_ttl = soft_ttl
+        self.refresher = refresher
+        self.lock = threading.Lock()
+        self.stale_hits = 0
+        self.refreshes = 0
+
+    def _entry(self, key: str) -> Optional[StampedValue]:
+        entry = self.backend.get(key)
+        # Entries written before the soft TTL was enabled are not stamped;
+        # treat them as misses.
+        return entry if isinstance(entry, StampedValue) else None
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entry(key)
+        if entry is None or time.time() - entry.written > self.soft_ttl:
+            return None
+        return entry.value
+
+    def get_or_refresh(self, key: str, refresh: Callable[..., Any], *args) -> Optional[Any]:
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        if time.time() - entry.written > self.soft_ttl:
+            scheduled = self.refresher.schedule((id(self), key), refresh, *args)
+            with self.lock:
+                self.stale_hits += 1
+                self.refreshes += scheduled
+        return entry.value
+
+    def put(self, key: str, value: Any) -> None:
+        self.backend.put(key, StampedValue(time.time(), value))
+
+    def remove(self, key: str) -> None:
+        self.backend.remove(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.backend.stats())
+        with self.lock:
+            stats.update(soft_ttl=self.soft_ttl, stale_hits=self.stale_hits, refreshes=self.refreshes)
+        return stats
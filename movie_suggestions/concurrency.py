@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# TMDB allows roughly 50 requests per second per IP; stay a little below it.
+TMDB_REQUESTS_PER_SECOND = 40
+TMDB_BURST = 20
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        # Callers reserve their tokens up front, letting the balance go
+        # negative, and sleep off the debt outside the lock. Waiters are
+        # therefore served in arrival order without polling.
+        with self.lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (tokens - self.tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return False
+            self.tokens -= tokens
+
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+tmdb_rate_limiter = TokenBucket(rate=TMDB_REQUESTS_PER_SECOND, capacity=TMDB_BURST)
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        # The first caller for a key runs fn; callers arriving while it is in
+        # flight wait on the same future and share its result or exception.
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+
+
+tmdb_single_flight = SingleFlight()
+
+
+class BackgroundRefresher:
+    # Runs refresh jobs on a small thread pool. A key already queued or
+    # running is not scheduled again, and once max_pending jobs are waiting
+    # new ones are dropped; the stale value is served until a later request
+    # schedules it again.
+    def __init__(self, workers: int = 2, max_pending: int = 64):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending: Set[Hashable] = set()
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def schedule(self, key: Hashable, fn: Callable[..., Any], *args) -> bool:
+        with self.lock:
+            if key in self.pending or len(self.pending) >= self.max_pending:
+                return False
+            self.pending.add(key)
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='cache-refresh'
+                )
+            executor = self.executor
+        executor.submit(self._run, key, fn, args)
+        return True
+
+    def _run(self, key: Hashable, fn: Callable[..., Any], args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.warning(f"Background refresh of {key!r} failed: {e}")
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+
+
+cache_refresher = BackgroundRefresher()
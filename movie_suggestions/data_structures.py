@@ -1,98 +1,728 @@
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
 from collections import defaultdict, OrderedDict
+from itertools import islice
+import bisect
+import heapq
+import os
+import re
+import sys
+import threading
 import time
+import unicodedata
 from collections import defaultdict
 from typing import List, Dict, Set
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
+from movie_suggestions.cache_backends import (
+    DEFAULT_SQLITE_PATH,
+    CacheBackend,
+    DjangoCache,
+    RefreshingCache,
+    SQLiteCache,
+    TieredCache,
+)
+
+# numpy, scipy, scikit-learn, NLTK and the similarity engine are imported where
+# they are first used: most processes (autocomplete requests, management
+# commands) never build a similarity graph and should not pay for loading them.
+
+def offer_top(top, word, score, top_k):
+    # Keeps `top`, a node's best completions as (-score, word) sorted best
+    # first, at no more than top_k entries. A word whose score drops keeps its
+    # slot with the new score; a better word that was cut earlier only
+    # returns on its next insert.
+    for i, (_, existing) in enumerate(top):
+        if existing == word:
+            del top[i]
+            break
+    entry = (-score, word)
+    if len(top) < top_k:
+        bisect.insort(top, entry)
+    elif entry < top[-1]:
+        bisect.insort(top, entry)
+        top.pop()
 
 class TrieNode:
     def __init__(self):
         self.children = {}
         self.is_end_of_word = False
+        self.score = 0.0
+        # Best completions below this node as (-score, word), kept sorted.
+        self.top = []
 
 class Trie:
-    def __init__(self):
+    def __init__(self, top_k: int = 10):
         self.root = TrieNode()
+        self.top_k = top_k
 
-    def insert(self, word):
+    def insert(self, word, score: float = 0.0):
         node = self.root
+        path = [node]
         for char in word:
             if char not in node.children:
                 node.children[char] = TrieNode()
             node = node.children[char]
+            path.append(node)
         node.is_end_of_word = True
+        node.score = score
 
-    def search_prefix(self, prefix):
+        for visited in path:
+            offer_top(visited.top, word, score, self.top_k)
+
+    def _find_node(self, prefix):
         node = self.root
         for char in prefix:
             if char not in node.children:
-                return []
+                return None
             node = node.children[char]
-        return self._get_words_from_node(node, prefix)
+        return node
+
+    def search_prefix(self, prefix, limit: Optional[int] = None):
+        node = self._find_node(prefix)
+        if node is None:
+            return []
+        if limit is not None and limit <= self.top_k:
+            return [word for _, word in node.top[:limit]]
+
+        ranked = sorted(self._get_words_from_node(node, prefix))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [word for _, word in ranked]
 
     def _get_words_from_node(self, node, prefix):
+        # Iterative walk over a shared character buffer; each word is joined
+        # once when reached instead of concatenating at every level.
         words = []
-        if node.is_end_of_word:
-            words.append(prefix)
-        for char, child in node.children.items():
-            words.extend(self._get_words_from_node(child, prefix + char))
+        chars = list(prefix)
+        stack = [(node, len(chars), None)]
+        while stack:
+            node, depth, char = stack.pop()
+            if char is not None:
+                del chars[depth - 1:]
+                chars.append(char)
+            if node.is_end_of_word:
+                words.append((-node.score, ''.join(chars)))
+            for char, child in node.children.items():
+                stack.append((child, depth + 1, char))
         return words
 
-movie_trie = Trie()
-actor_trie = Trie()
+class RadixNode:
+    __slots__ = ('children', 'label', 'word', 'score', 'top', 'payload')
+
+    def __init__(self, label: str = ''):
+        # Children are keyed by the first character of their edge label.
+        self.children = {}
+        self.label = label
+        # The full word for terminal nodes, shared with the top lists.
+        self.word = None
+        self.score = 0.0
+        # Leaves rank only themselves, so they carry no list of their own.
+        self.top = None
+        self.payload = None
+
+class RadixTrie:
+    # Path-compressed counterpart of Trie: chains of single-child nodes are
+    # merged into one edge label, so a name costs about one node instead of
+    # one node per character. Same insert/search_prefix API and ranking.
+    def __init__(self, top_k: int = 10):
+        self.root = RadixNode()
+        self.root.top = []
+        self.top_k = top_k
+        self.size = 0
+        # Writers are serialised. Inserts copy the nodes on their path and
+        # publish the new root last, so lookups, which read self.root once,
+        # see one complete version of the trie and stay lock-free.
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, word):
+        node = self._find_node(word)
+        return node is not None and node.word == word
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def copy(self) -> 'RadixTrie':
+        # Published nodes are never modified, so the copy shares all of them.
+        other = RadixTrie(self.top_k)
+        with self.lock:
+            other.root, other.size = self.root, self.size
+        return other
+
+    def load(self, other: 'RadixTrie'):
+        # Adopts another trie's contents in place, so modules that imported
+        # this instance see the loaded words.
+        with self.lock:
+            self.root, self.top_k, self.size = other.root, other.top_k, other.size
+
+    @staticmethod
+    def _top(node):
+        if node.top is not None:
+            return node.top
+        return [(-node.score, node.word)] if node.word is not None else []
+
+    def insert(self, word, score: float = 0.0, payload: Any = None):
+        with self.lock:
+            self._insert(word, score, payload)
+
+    @staticmethod
+    def _copy(node, label=None):
+        copy = RadixNode(node.label if label is None else label)
+        copy.children = dict(node.children)
+        copy.word, copy.score, copy.payload = node.word, node.score, node.payload
+        copy.top = None if node.top is None else list(node.top)
+        return copy
+
+    def _insert(self, word, score, payload):
+        root = node = self._copy(self.root)
+        path = [node]
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None:
+                if node.top is None:
+                    node.top = self._top(node)
+                leaf = RadixNode(word[i:])
+                node.children[word[i]] = leaf
+                node = leaf
+                path.append(node)
+                break
+
+            label = child.label
+            common = 0
+            limit = min(len(label), len(word) - i)
+            while common < limit and label[common] == word[i + common]:
+                common += 1
+
+            if common < len(label):
+                tail = self._copy(child, label[common:])
+                middle = RadixNode(label[:common])
+                middle.top = list(self._top(child))
+                middle.children[tail.label[0]] = tail
+                child = middle
+            else:
+                child = self._copy(child)
+            node.children[word[i]] = child
+
+            node = child
+            path.append(node)
+            i += common
+
+        if node.word is None:
+            self.size += 1
+        node.word = word
+        node.score = score
+        node.payload = payload
+
+        for visited in path:
+            if visited.top is not None:
+                offer_top(visited.top, word, score, self.top_k)
+        self.root = root
+
+    def _find_node(self, prefix):
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            label = child.label
+            if prefix.startswith(label, i):
+                i += len(label)
+            elif label.startswith(prefix[i:]):
+                i = len(prefix)
+            else:
+                return None
+            node = child
+        return node
+
+    def get(self, word) -> Any:
+        node = self._find_node(word)
+        if node is None or node.word != word:
+            return None
+        return node.payload
+
+    def search_prefix(self, prefix, limit: Optional[int] = None):
+        node = self._find_node(prefix)
+        if node is None:
+            return []
+        if limit is not None and limit <= self.top_k:
+            return [word for _, word in self._top(node)[:limit]]
+
+        ranked = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.word is not None:
+                ranked.append((-node.score, node.word))
+            stack.extend(node.children.values())
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [word for _, word in ranked]
+
+    def search_prefix_items(self, prefix, limit: Optional[int] = None):
+        return [(word, self.get(word)) for word in self.search_prefix(prefix, limit)]
+
+    def fuzzy_search(self, query, max_distance: int = 2, limit: int = 10, prefix: bool = True):
+        # Depth-first walk carrying one row of the edit-distance table (with
+        # adjacent transpositions) per character; a branch is dropped as soon
+        # as every cell of its row exceeds max_distance. In prefix mode a word
+        # matches when some prefix of it is within max_distance of the query,
+        # and a subtree reached at distance d contributes its top-k list.
+        matches = {}
+
+        def record(entries, distance):
+            for negative_score, word in entries[:limit]:
+                if word not in matches or distance < matches[word][0]:
+                    matches[word] = (distance, -negative_score)
+
+        root = self.root
+        first_row = list(range(len(query) + 1))
+        if prefix and first_row[-1] <= max_distance:
+            record(self._top(root), first_row[-1])
+
+        # Runs without the lock: the walk starts from one published root,
+        # whose nodes inserts never modify.
+        stack = [(child, first_row, None, None) for child in tuple(root.children.values())]
+        while stack:
+            node, row, previous_row, previous_char = stack.pop()
+            descend = True
+            for char in node.label:
+                current = [row[0] + 1]
+                for j in range(1, len(query) + 1):
+                    cost = 0 if query[j - 1] == char else 1
+                    distance = min(current[j - 1] + 1, row[j] + 1, row[j - 1] + cost)
+                    if (previous_row is not None and j > 1 and query[j - 1] == previous_char
+                            and query[j - 2] == char):
+                        distance = min(distance, previous_row[j - 2] + 1)
+                    current.append(distance)
+                previous_row, row, previous_char = row, current, char
+
+                lowest = min(row)
+                if lowest > max_distance:
+                    descend = False
+                    break
+                if prefix and row[-1] <= max_distance:
+                    record(self._top(node), row[-1])
+                    if lowest >= row[-1]:
+                        # Nothing deeper can match more closely.
+                        descend = False
+                        break
+
+            if not descend:
+                continue
+            if not prefix and node.word is not None and row[-1] <= max_distance:
+                record([(-node.score, node.word)], row[-1])
+            for child in tuple(node.children.values()):
+                stack.append((child, row, previous_row, previous_char))
+
+        ranked = sorted(matches.items(), key=lambda item: (item[1][0], -item[1][1], item[0]))
+        return [word for word, _ in ranked[:limit]]
+
+def typo_budget(query: str) -> int:
+    # Short prefixes tolerate no typos (too many near neighbours), medium ones
+    # one edit and longer ones two.
+    if len(query) < 3:
+        return 0
+    return 1 if len(query) < 6 else 2
+
+
+# Letters that NFKD leaves intact but users type without the stroke.
+_FOLDED_LETTERS = str.maketrans({
+    'ø': 'o', 'ł': 'l', 'đ': 'd', 'ħ': 'h', 'ı': 'i', 'æ': 'ae', 'œ': 'oe', 'þ': 'th', 'ð': 'd',
+})
+_SEPARATORS = set('-_/.')
+
+
+def normalize_key(text: str) -> str:
+    # "Penélope Cruz", "PENELOPE  CRUZ" and "penelope-cruz" all become
+    # "penelope cruz"; other punctuation is dropped, so "O'Brien" is "obrien".
+    decomposed = unicodedata.normalize('NFKD', text.casefold()).translate(_FOLDED_LETTERS)
+    chars = []
+    for char in decomposed:
+        if unicodedata.combining(char):
+            continue
+        if char.isalnum():
+            chars.append(char)
+        elif char.isspace() or char in _SEPARATORS:
+            chars.append(' ')
+    return ' '.join(''.join(chars).split())
+
 
-class LRUCache:
-    def __init__(self, capacity: int = 1000, ttl: int = 3600):
+class SearchIndex:
+    # Entities (e.g. TMDB people) are looked up through normalized keys in a
+    # RadixTrie whose payload maps entity ids to scores, so several aliases
+    # can point at one entity and results come back as canonical names.
+    # Aliases of one entity can fill a search's window of keys, which is then
+    # widened to ALIAS_WINDOW times the limit; the trie ranks that many keys
+    # per node so the wider search still reads a top list, not a subtree.
+    ALIAS_WINDOW = 3
+
+    def __init__(self, top_k: int = 10):
+        self.trie = RadixTrie(top_k * self.ALIAS_WINDOW)
+        self.names: Dict[Any, str] = {}
+        self.scores: Dict[Any, float] = {}
+        self.keys: Dict[Any, Set[str]] = {}
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.names
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def add(self, entity_id, name: str, score: float = 0.0, aliases=()):
+        with self.lock:
+            self.names[entity_id] = name
+            self.scores[entity_id] = score
+            # Replaced rather than updated, so copies may share the old set.
+            keys = self.keys.get(entity_id, set()) | {
+                key for key in map(normalize_key, (name, *aliases)) if key
+            }
+            self.keys[entity_id] = keys
+            for key in keys:
+                entities = dict(self.trie.get(key) or {})
+                if entities.get(entity_id) == score:
+                    continue
+                entities[entity_id] = score
+                self.trie.insert(key, max(entities.values()), entities)
+
+    def copy(self) -> 'SearchIndex':
+        other = SearchIndex()
+        with self.lock:
+            other.trie = self.trie.copy()
+            other.names, other.scores, other.keys = dict(self.names), dict(self.scores), dict(self.keys)
+        return other
+
+    def name(self, entity_id) -> Optional[str]:
+        return self.names.get(entity_id)
+
+    def entries(self):
+        # (id, name, score, keys) tuples; keys are already normalized and can
+        # be passed back to add() as aliases.
+        with self.lock:
+            return [(entity_id, name, self.scores[entity_id], sorted(self.keys[entity_id]))
+                    for entity_id, name in self.names.items()]
+
+    def lookup(self, text: str) -> List[Any]:
+        entities = self.trie.get(normalize_key(text)) or {}
+        return sorted(entities, key=entities.get, reverse=True)
+
+    def _collect(self, keys, found: List[Any], limit: int):
+        for key in keys:
+            entities = self.trie.get(key) or {}
+            for entity_id in sorted(entities, key=entities.get, reverse=True):
+                if entity_id not in found:
+                    found.append(entity_id)
+                    if len(found) >= limit:
+                        return
+
+    def search(self, prefix: str, limit: int = 10, fuzzy: bool = True) -> List[Any]:
+        key = normalize_key(prefix)
+        if not key:
+            return []
+
+        found = []
+        with self.lock:
+            # Aliases of one entity can take several of the first keys, so
+            # widen the window once if deduplication left slots empty.
+            keys = self.trie.search_prefix(key, limit)
+            self._collect(keys, found, limit)
+            # Capped, as tries from older snapshots rank fewer keys.
+            wider = min(limit * self.ALIAS_WINDOW, self.trie.top_k)
+            if len(found) < limit and len(keys) == limit and wider > limit:
+                self._collect(self.trie.search_prefix(key, wider), found, limit)
+
+            # Remaining slots go to keys one or two typos away, ranked after
+            # the exact prefix matches.
+            max_distance = typo_budget(key)
+            if fuzzy and len(found) < limit and max_distance:
+                self._collect(self.trie.fuzzy_search(key, max_distance, limit), found, limit)
+        return found
+
+
+class MovieSuggestion(NamedTuple):
+    id: int
+    title: str
+    year: str
+    popularity: float
+
+
+movie_trie = RadixTrie()
+
+def approximate_size(value: Any) -> int:
+    # Deep sys.getsizeof over the container types that cached TMDB payloads
+    # are made of; shared objects are counted once.
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return total
+
+class LRUCache(CacheBackend):
+    def __init__(self, capacity: int = 1000, ttl: int = 3600,
+                 max_bytes: Optional[int] = None,
+                 sizer: Callable[[Any], int] = approximate_size):
         self.capacity = capacity
         self.ttl = ttl
+        # When max_bytes is set, entries are also evicted until the summed
+        # sizer() estimates fit; an entry bigger than the budget is not stored.
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self.sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.rejections = 0
         self.cache = OrderedDict()
-        self.timestamps = {}
+        # Kept in write order, so expired entries are always at the front and
+        # each put can sweep them off in amortised O(1).
+        self.timestamps = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Optional[Any]:
-        if key not in self.cache:
-            return None
+        with self.lock:
+            if key not in self.cache:
+                self.misses += 1
+                return None
 
-        if time.time() - self.timestamps[key] > self.ttl:
-            self.remove(key)
-            return None
+            if time.time() - self.timestamps[key] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
 
-        value = self.cache.pop(key)
-        self.cache[key] = value
-        return value
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
 
     def put(self, key: str, value: Any) -> None:
-        if key in self.cache:
-            self.cache.pop(key)
-        elif len(self.cache) >= self.capacity:
-            oldest_key, _ = self.cache.popitem(last=False)
-            del self.timestamps[oldest_key]
+        size = self.sizer(value) if self.max_bytes is not None else 0
 
-        self.cache[key] = value
-        self.timestamps[key] = time.time()
+        with self.lock:
+            now = time.time()
+            self._sweep(now)
 
-    def remove(self, key: str) -> None:
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._remove(key)
+                self.rejections += 1
+                return
+
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.timestamps.move_to_end(key)
+                self.total_bytes -= self.sizes[key]
+            self.cache[key] = value
+            self.timestamps[key] = now
+            self.sizes[key] = size
+            self.total_bytes += size
+
+            while len(self.cache) > self.capacity or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self.cache))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _sweep(self, now: float) -> None:
+        while self.timestamps:
+            key, written = next(iter(self.timestamps.items()))
+            if now - written <= self.ttl:
+                break
+            self._remove(key)
+            self.expirations += 1
+
+    def _remove(self, key: str) -> None:
         if key in self.cache:
             del self.cache[key]
             del self.timestamps[key]
+            self.total_bytes -= self.sizes.pop(key)
+
+    def remove(self, key: str) -> None:
+        with self.lock:
+            self._remove(key)
 
     def clear(self) -> None:
-        self.cache.clear()
-        self.timestamps.clear()
+        with self.lock:
+            self.cache.clear()
+            self.timestamps.clear()
+            self.sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.cache),
+                'capacity': self.capacity,
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'rejections': self.rejections,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
 
 class CacheManager:
-    def __init__(self):
-        self.movie_cache = LRUCache(capacity=1000, ttl=86400)
-        self.actor_cache = LRUCache(capacity=1000, ttl=86400)
-        self.search_cache = LRUCache(capacity=500, ttl=1800)
-        self.similarity_cache = LRUCache(capacity=2000, ttl=3600)
+    MB = 1024 * 1024
+    BACKENDS = ('memory', 'sqlite', 'django', 'tiered')
+    # Entries copied into the in-process tier of a tiered cache are dropped
+    # sooner, so workers pick up each other's writes to the shared store.
+    TIERED_FRONT_TTL = 300
+
+    def __init__(self, backend: Optional[str] = None, shared_backend: Optional[str] = None,
+                 sqlite_path: Optional[str] = None, django_alias: Optional[str] = None,
+                 stale_factor: Optional[float] = None):
+        self.backend = backend or os.environ.get('KINOLOGIKA_CACHE_BACKEND', 'memory')
+        self.shared_backend = shared_backend or os.environ.get('KINOLOGIKA_CACHE_SHARED', 'sqlite')
+        self.sqlite_path = sqlite_path or os.environ.get('KINOLOGIKA_CACHE_PATH', DEFAULT_SQLITE_PATH)
+        self.django_alias = django_alias or os.environ.get('KINOLOGIKA_CACHE_ALIAS', 'default')
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Unknown cache backend: {self.backend}")
+        if self.shared_backend not in ('sqlite', 'django'):
+            raise ValueError(f"Unknown shared cache backend: {self.shared_backend}")
+        # With a stale factor, each cache's TTL becomes a soft TTL: older
+        # entries are still served (and refreshed in the background) until
+        # they reach stale_factor times that age.
+        if stale_factor is None:
+            stale_factor = float(os.environ.get('KINOLOGIKA_CACHE_STALE_FACTOR') or 0)
+        if stale_factor and stale_factor < 1:
+            raise ValueError("stale_factor must be at least 1")
+        self.stale_factor = stale_factor
+
+        self.actor_cache = self._make_cache('actor', capacity=1000, ttl=86400, max_bytes=64 * self.MB)
+        self.search_cache = self._make_cache('search', capacity=500, ttl=1800, max_bytes=16 * self.MB)
+        self.similarity_cache = self._make_cache('similarity', capacity=2000, ttl=3600, max_bytes=32 * self.MB)
+        self.caches = {
+            'actor': self.actor_cache,
+            'search': self.search_cache,
+            'similarity': self.similarity_cache,
+        }
+
+    def _make_shared_cache(self, kind: str, name: str, capacity: int, ttl: int) -> CacheBackend:
+        if kind == 'django':
+            return DjangoCache(name, ttl=ttl, alias=self.django_alias)
+        return SQLiteCache(name, ttl=ttl, capacity=capacity, path=self.sqlite_path)
+
+    def _make_cache(self, name: str, capacity: int, ttl: int, max_bytes: int) -> CacheBackend:
+        if self.stale_factor:
+            store = self._make_store(name, capacity, int(ttl * self.stale_factor), max_bytes)
+            return RefreshingCache(store, soft_ttl=ttl)
+        return self._make_store(name, capacity, ttl, max_bytes)
+
+    def _make_store(self, name: str, capacity: int, ttl: int, max_bytes: int) -> CacheBackend:
+        if self.backend == 'memory':
+            return LRUCache(capacity=capacity, ttl=ttl, max_bytes=max_bytes)
+        if self.backend == 'tiered':
+            return TieredCache(
+                LRUCache(capacity=capacity, ttl=min(ttl, self.TIERED_FRONT_TTL), max_bytes=max_bytes),
+                self._make_shared_cache(self.shared_backend, name, capacity, ttl),
+            )
+        return self._make_shared_cache(self.backend, name, capacity, ttl)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: cache.stats() for name, cache in self.caches.items()}
 
 cache_manager = CacheManager()
 
+# Stemmed keywords and mood scores depend only on a movie's TMDB keywords and
+# synopsis, so they are computed once per movie and shared by every graph.
+MOVIE_FEATURE_CACHE_SIZE = 5000
+movie_feature_cache = LRUCache(capacity=MOVIE_FEATURE_CACHE_SIZE, ttl=7 * 86400)
+
+_stemmer = None
+
+
+def get_stemmer():
+    # PorterStemmer holds no per-call state, so one instance serves all threads.
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem import PorterStemmer
+
+        _stemmer = PorterStemmer()
+    return _stemmer
+
+
 class MovieSimilarityGraph:
-    def __init__(self):
+    ENGINES = ('vectorized', 'scalar')
+    TOP_K_BLOCK_ROWS = 256
+    # Below this many movies, starting the work in other processes costs more
+    # than scoring in this one.
+    PARALLEL_MIN_MOVIES = 1000
+    # Below this many movies, scoring new movies against all of them is cheap
+    # enough that the approximate shortlist is not worth its recall loss.
+    ANN_MIN_MOVIES = 500
+    # With the shortlist in use, new movies are still scored exactly against
+    # each other and this many most recently used movies, which include the
+    # movie a recommendation request started from.
+    ANN_EXACT_RECENT = 256
+
+    def __init__(self, engine: str = 'vectorized', top_k: Optional[int] = None,
+                 max_movies: Optional[int] = None, workers: Optional[int] = None,
+                 ann_shortlist: Optional[int] = None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown similarity engine: {engine}")
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be a positive integer")
+        if max_movies is not None and max_movies < 2:
+            raise ValueError("max_movies must be at least 2")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be a positive integer")
+        if ann_shortlist is not None and (top_k is None or ann_shortlist < top_k):
+            raise ValueError("ann_shortlist needs top_k and must be at least top_k")
+        self.engine = engine
+        # With workers > 1, full vectorized builds of large graphs score
+        # blocks of rows in that many worker processes.
+        self.workers = workers
+        # With top_k set, self.graph keeps only each movie's top_k strongest
+        # edges (so it is no longer symmetric); otherwise it holds every pair.
+        self.top_k = top_k
+        # With max_movies set, the least recently used movies and their edges
+        # are evicted once the graph grows past the cap.
+        self.max_movies = max_movies
+        # With ann_shortlist set, movies added to a graph of at least
+        # ANN_MIN_MOVIES are scored exactly against only that many nearest
+        # movies from a vector index (besides the new and recently used
+        # movies), instead of against every movie.
+        self.ann_shortlist = ann_shortlist
+        self._vector_index = None
+        self.lock = threading.RLock()
+        self._recency = OrderedDict()
+        self._scored: Set[int] = set()
+        self._scored_generation = 0
         self.movies = {}
         self.graph = defaultdict(dict)
         self.genre_weights = {}
@@ -122,10 +752,27 @@ class MovieSimilarityGraph:
             'action-packed': ['action', 'adventure', 'superhero', 'war', 'martial arts', 'explosive', 'fast-paced'],
             'surreal': ['fantasy', 'science fiction', 'supernatural', 'magical', 'dreamlike', 'bizarre']
         }
+        # Compiled once here; assign a new mood_indicators dict only before
+        # adding movies.
+        self._mood_key = tuple((mood, tuple(indicators)) for mood, indicators in self.mood_indicators.items())
+        self._mood_matchers = self._compile_mood_matchers(self.mood_indicators)
         self.similarities_computed = False
+        # Plot similarity is computed from one TF-IDF model fitted over every
+        # synopsis the graph holds; movies added afterwards are projected onto
+        # the fitted vocabulary instead of refitting.
+        self._plot_vectorizer = None
+        self._plot_ids: List[Optional[int]] = []
+        self._plot_index: Dict[int, int] = {}
+        self._plot_pending: Set[int] = set()
+        self._plot_matrix = None
+        self._plot_fitted_size = 0
+        self._plot_dead = 0
+        self._plot_generation = 0
 
     def preprocess_keywords(self, keywords: List[str]) -> Set[str]:
-        stemmer = PorterStemmer()
+        from nltk.tokenize import word_tokenize
+
+        stemmer = get_stemmer()
         processed = set()
         
         for keyword in keywords:
@@ -143,8 +790,7 @@ class MovieSimilarityGraph:
              runtime: int = None, synopsis: str = None,
              poster_path: str = None,  
              release_date: str = None):  
-        processed_keywords = self.preprocess_keywords(keywords or [])
-        mood_scores = self.analyze_mood(keywords or [], synopsis or '')
+        processed_keywords, mood_scores = self.movie_features(movie_id, keywords or [], synopsis or '')
 
         if release_date:
             try:
@@ -156,8 +802,8 @@ class MovieSimilarityGraph:
         print(f"Adding movie: {title} with year: {year}") 
 
         year = int(release_date.split('-')[0]) if release_date else 0
-        
-        self.movies[movie_id] = {
+
+        movie = {
             'title': title,
             'genres': set(genres),
             'cast': list(cast),
@@ -172,7 +818,78 @@ class MovieSimilarityGraph:
             'poster_path': poster_path,  
             'release_date': release_date  
         }
-        self.similarities_computed = False
+
+        with self.lock:
+            if self.movies.get(movie_id) == movie:
+                self.touch(movie_id)
+                return
+            if movie_id in self.movies:
+                self._remove_movie(movie_id)
+
+            self.movies[movie_id] = movie
+            self._recency[movie_id] = None
+            if self.ann_shortlist is not None:
+                self._movie_vectors().add(movie_id, movie)
+            if synopsis:
+                self._plot_pending.add(movie_id)
+            self.similarities_computed = False
+
+            if self.max_movies is not None:
+                while len(self.movies) > self.max_movies:
+                    oldest_id = next(iter(self._recency))
+                    self._remove_movie(oldest_id)
+
+    def movie_features(self, movie_id: int, keywords: List[str], synopsis: str):
+        # The inputs are kept beside the features, so an entry computed from
+        # other keywords, synopsis or mood indicators is recomputed.
+        fingerprint = (tuple(keywords), synopsis, self._mood_key)
+        cache_key = f"features_{movie_id}"
+        cached = movie_feature_cache.get(cache_key)
+        if cached is None or cached[0] != fingerprint:
+            cached = (
+                fingerprint,
+                frozenset(self.preprocess_keywords(keywords)),
+                self.analyze_mood(keywords, synopsis),
+            )
+            movie_feature_cache.put(cache_key, cached)
+        return cached[1], dict(cached[2])
+
+    def _movie_vectors(self):
+        if self._vector_index is None:
+            from movie_suggestions.vector_index import MovieVectorIndex
+
+            self._vector_index = MovieVectorIndex(list(self.mood_indicators), self.genre_hierarchy)
+        return self._vector_index
+
+    def __contains__(self, movie_id: int) -> bool:
+        return movie_id in self.movies
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    def touch(self, movie_id: int) -> bool:
+        with self.lock:
+            if movie_id not in self._recency:
+                return False
+            self._recency.move_to_end(movie_id)
+            return True
+
+    def _remove_movie(self, movie_id: int):
+        del self.movies[movie_id]
+        del self._recency[movie_id]
+        self._scored.discard(movie_id)
+        self._remove_from_plot_index(movie_id)
+        if self._vector_index is not None:
+            self._vector_index.remove(movie_id)
+
+        edges = self.graph.pop(movie_id, {})
+        if self.top_k is None:
+            for other_id in edges:
+                self.graph[other_id].pop(movie_id, None)
+        else:
+            # Top-k edges are directed, so any movie may point at this one.
+            for other_edges in self.graph.values():
+                other_edges.pop(movie_id, None)
 
     def calculate_genre_similarity(self, genres1: Set[str], genres2: Set[str]) -> float:
         score = 0
@@ -205,10 +922,88 @@ class MovieSimilarityGraph:
         diff = abs(runtime1 - runtime2)
         return max(0, 1 - (diff / 30) ** 2)
 
+    def _fit_plot_index(self):
+        had_matrix = self._plot_matrix is not None
+        self._plot_ids = [mid for mid, movie in self.movies.items() if movie.get('synopsis')]
+        self._plot_index = {mid: i for i, mid in enumerate(self._plot_ids)}
+        self._plot_pending.clear()
+        self._plot_vectorizer = None
+        self._plot_matrix = None
+        self._plot_fitted_size = len(self._plot_ids)
+        self._plot_dead = 0
+
+        if self._plot_ids:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            vectorizer = TfidfVectorizer(stop_words='english')
+            try:
+                matrix = vectorizer.fit_transform(
+                    [self.movies[mid]['synopsis'] for mid in self._plot_ids]
+                )
+                self._plot_vectorizer = vectorizer
+                self._plot_matrix = matrix.tocsr()
+            except ValueError:
+                # Every synopsis was made of stop words only.
+                pass
+
+        # A refit changes every plot score, so scored pairs are stale.
+        if had_matrix or self._plot_matrix is not None:
+            self._plot_generation += 1
+
+    def _extend_plot_index(self, movie_ids: List[int]):
+        import scipy.sparse as sp
+
+        new_rows = self._plot_vectorizer.transform(
+            [self.movies[mid]['synopsis'] for mid in movie_ids]
+        )
+        self._plot_matrix = sp.vstack([self._plot_matrix, new_rows]).tocsr()
+
+        for mid in movie_ids:
+            self._plot_index[mid] = len(self._plot_ids)
+            self._plot_ids.append(mid)
+        self._plot_pending.clear()
+
+    def _remove_from_plot_index(self, movie_id: int):
+        self._plot_pending.discard(movie_id)
+        row = self._plot_index.pop(movie_id, None)
+        if row is not None:
+            # The row stays in the matrix until the next refit.
+            self._plot_ids[row] = None
+            self._plot_dead += 1
+
+    def _update_plot_index(self):
+        if not self._plot_pending:
+            return
+        pending = [mid for mid in self.movies if mid in self._plot_pending]
+
+        # Refit once the projected movies outnumber the fitted corpus, as the
+        # frozen vocabulary and IDF weights no longer describe the collection,
+        # or once evicted rows make up most of the matrix.
+        if (self._plot_vectorizer is None
+                or len(self._plot_ids) + len(pending) > 2 * self._plot_fitted_size
+                or self._plot_dead > len(self._plot_index)):
+            self._fit_plot_index()
+        else:
+            self._extend_plot_index(pending)
+
+    def get_plot_similarity(self, movie1_id: int, movie2_id: int) -> float:
+        self._update_plot_index()
+        if self._plot_matrix is None:
+            return 0
+        i = self._plot_index.get(movie1_id)
+        j = self._plot_index.get(movie2_id)
+        if i is None or j is None:
+            return 0
+        # Rows are L2-normalised, so their dot product is the cosine similarity.
+        return float(self._plot_matrix[i].multiply(self._plot_matrix[j]).sum())
+
     def calculate_plot_similarity(self, synopsis1: Optional[str], synopsis2: Optional[str]) -> float:
         if not synopsis1 or not synopsis2:
             return 0
-            
+
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+
         vectorizer = TfidfVectorizer(stop_words='english')
         try:
             tfidf_matrix = vectorizer.fit_transform([synopsis1, synopsis2])
@@ -216,25 +1011,46 @@ class MovieSimilarityGraph:
         except Exception:
             return 0
 
+    @staticmethod
+    def _compile_mood_matchers(mood_indicators: Dict[str, List[str]]) -> List['re.Pattern']:
+        # A lookahead alternation reports every position where an indicator
+        # starts, overlapping ones included, but only the first alternative
+        # matching there. Indicators that are a prefix of another therefore go
+        # into a later pattern; with the default list there is just one.
+        layers: List[List[str]] = []
+        indicators = {indicator for group in mood_indicators.values() for indicator in group}
+        for indicator in sorted(indicators, key=len, reverse=True):
+            for layer in layers:
+                if not any(other.startswith(indicator) for other in layer):
+                    layer.append(indicator)
+                    break
+            else:
+                layers.append([indicator])
+        return [re.compile('(?=(' + '|'.join(map(re.escape, layer)) + '))') for layer in layers]
+
     def analyze_mood(self, keywords: List[str], synopsis: str) -> Dict[str, float]:
         movie_words = set(word.lower() for word in keywords)
         if synopsis:
             movie_words.update(word.lower() for word in synopsis.split())
-        
-        mood_scores = {}
-        for mood, indicators in self.mood_indicators.items():
-            matches = sum(1 for indicator in indicators if any(
-                indicator in word for word in movie_words
-            ))
-            mood_scores[mood] = matches / len(indicators)
-            
-        return mood_scores
+
+        # An indicator counts when it occurs inside any word; the separator
+        # keeps matches from spanning two words.
+        text = '\x00'.join(movie_words)
+        found = set()
+        for matcher in self._mood_matchers:
+            found.update(match.group(1) for match in matcher.finditer(text))
+
+        return {
+            mood: sum(1 for indicator in indicators if indicator in found) / len(indicators)
+            for mood, indicators in self.mood_indicators.items()
+        }
 
     def calculate_temporal_rating(self, movie: Dict, current_year: int = 2024) -> float:
         time_weight = 0.95 ** (current_year - movie['year'])
         return movie['rating'] * time_weight
 
-    def calculate_similarity(self, movie_1: Dict, movie_2: Dict) -> float:
+    def calculate_similarity(self, movie_1: Dict, movie_2: Dict,
+                             plot_score: Optional[float] = None) -> float:
         score = 0
         
         genre_score = self.calculate_genre_similarity(movie_1['genres'], movie_2['genres'])
@@ -262,9 +1078,10 @@ class MovieSimilarityGraph:
         score += runtime_score
         
         if movie_1.get('synopsis') and movie_2.get('synopsis'):
-            plot_score = self.calculate_plot_similarity(
-                movie_1['synopsis'], movie_2['synopsis']
-            )
+            if plot_score is None:
+                plot_score = self.calculate_plot_similarity(
+                    movie_1['synopsis'], movie_2['synopsis']
+                )
             score += plot_score * 2
         
         mood_diff = sum(
@@ -285,31 +1102,222 @@ class MovieSimilarityGraph:
         return score
 
     def build_graph(self):
-        self._calculate_genre_weights()
-        movie_ids = list(self.movies.keys())
-        
+        with self.lock:
+            self._calculate_genre_weights()
+            self._update_plot_index()
+            movie_ids = list(self.movies.keys())
+            pending = [movie_id for movie_id in movie_ids if movie_id not in self._scored]
+
+            if not self._scored or self._scored_generation != self._plot_generation:
+                self.graph = defaultdict(dict)
+                if self.engine == 'vectorized':
+                    self._build_graph_vectorized(movie_ids)
+                elif self.top_k is not None:
+                    self._build_graph_scalar_top_k(movie_ids)
+                else:
+                    self._build_graph_scalar(movie_ids)
+            elif pending:
+                self._score_new_movies(pending, movie_ids)
+
+            self._scored = set(movie_ids)
+            self._scored_generation = self._plot_generation
+            self.similarities_computed = True
+
+    def _score_new_movies(self, pending: List[int], movie_ids: List[int]):
+        import numpy as np
+        from movie_suggestions.similarity_engine import pack_features, score_block
+
+        if self.ann_shortlist is not None and len(movie_ids) >= self.ANN_MIN_MOVIES:
+            self._score_new_movies_ann(pending)
+            return
+
+        # Only the new rows of the similarity matrix are scored; pairs among
+        # the movies already held keep their edges.
+        position = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        columns = np.arange(len(movie_ids))
+        features = pack_features(self, movie_ids) if self.engine == 'vectorized' else None
+
+        for start in range(0, len(pending), self.TOP_K_BLOCK_ROWS):
+            block = pending[start:start + self.TOP_K_BLOCK_ROWS]
+            rows = np.array([position[movie_id] for movie_id in block])
+            if features is not None:
+                scores = score_block(features, rows, columns)
+            else:
+                scores = np.array([
+                    [self._pair_similarity(movie_id, other_id) if movie_id != other_id else 0.0
+                     for other_id in movie_ids]
+                    for movie_id in block
+                ]).reshape(len(block), len(movie_ids))
+            scores[np.arange(len(block)), rows] = -np.inf
+
+            for offset, movie_id in enumerate(block):
+                row = scores[offset]
+                if self.top_k is None:
+                    for j in np.flatnonzero(row > 0).tolist():
+                        weight = float(row[j])
+                        self.graph[movie_id][movie_ids[j]] = weight
+                        self.graph[movie_ids[j]][movie_id] = weight
+                    continue
+
+                k = min(self.top_k, len(movie_ids) - 1)
+                if k > 0:
+                    for j in np.argpartition(-row, k - 1)[:k].tolist():
+                        if row[j] > 0:
+                            self.graph[movie_id][movie_ids[j]] = float(row[j])
+                for j in np.flatnonzero(row > 0).tolist():
+                    other_id = movie_ids[j]
+                    if other_id in self._scored:
+                        self._offer_neighbour(other_id, movie_id, float(row[j]))
+
+    def _score_new_movies_ann(self, pending: List[int]):
+        import numpy as np
+        from movie_suggestions.similarity_engine import pack_features, score_block
+
+        # Only the shortlisted pairs are kept, but they are scored with the
+        # exact scorer, so the edges carry the weights a full scan would give.
+        # A request adds its seed's TMDB candidates together and touches the
+        # seed just before, so pairs among those never depend on the shortlist.
+        index = self._movie_vectors()
+        recent = list(islice(reversed(self._recency), self.ANN_EXACT_RECENT))
+        exact = list(dict.fromkeys([*pending, *recent]))
+        shortlists = {
+            movie_id: list(dict.fromkeys(
+                [*exact, *index.nearest(movie_id, self.ann_shortlist)]
+            ))
+            for movie_id in pending
+        }
+        candidate_ids = list(dict.fromkeys(
+            [*pending, *(other_id for shortlist in shortlists.values() for other_id in shortlist)]
+        ))
+        position = {movie_id: i for i, movie_id in enumerate(candidate_ids)}
+
+        if self.engine == 'vectorized':
+            features = pack_features(self, candidate_ids)
+            scores = score_block(features, np.arange(len(pending)), np.arange(len(candidate_ids)))
+
+        for row, movie_id in enumerate(pending):
+            for other_id in shortlists[movie_id]:
+                if other_id == movie_id:
+                    continue
+                if self.engine == 'vectorized':
+                    weight = float(scores[row, position[other_id]])
+                else:
+                    weight = self._pair_similarity(movie_id, other_id)
+                if weight <= 0:
+                    continue
+                self._offer_neighbour(movie_id, other_id, weight)
+                if other_id in self._scored:
+                    self._offer_neighbour(other_id, movie_id, weight)
+
+    def _offer_neighbour(self, movie_id: int, candidate_id: int, weight: float):
+        edges = self.graph[movie_id]
+        if len(edges) < self.top_k:
+            edges[candidate_id] = weight
+            return
+        weakest_id = min(edges, key=edges.get)
+        if weight > edges[weakest_id]:
+            del edges[weakest_id]
+            edges[candidate_id] = weight
+
+    def _pair_similarity(self, movie1_id: int, movie2_id: int) -> float:
+        # Not memoised by id across graphs: plot scores depend on the corpus
+        # this graph's TF-IDF model was fitted on.
+        return self.calculate_similarity(
+            self.movies[movie1_id],
+            self.movies[movie2_id],
+            plot_score=self.get_plot_similarity(movie1_id, movie2_id),
+        )
+
+    def _build_graph_scalar(self, movie_ids: List[int]):
         for i in range(len(movie_ids)):
             for j in range(i + 1, len(movie_ids)):
                 movie1_id = movie_ids[i]
                 movie2_id = movie_ids[j]
-                
-                cache_key = f"similarity_{min(movie1_id, movie2_id)}_{max(movie1_id, movie2_id)}"
-                cached_similarity = cache_manager.similarity_cache.get(cache_key)
-                
-                if cached_similarity is not None:
-                    weight = cached_similarity
-                else:
-                    weight = self.calculate_similarity(
-                        self.movies[movie1_id],
-                        self.movies[movie2_id]
-                    )
-                    cache_manager.similarity_cache.put(cache_key, weight)
-                
+                weight = self._pair_similarity(movie1_id, movie2_id)
                 if weight > 0:
                     self.graph[movie1_id][movie2_id] = weight
                     self.graph[movie2_id][movie1_id] = weight
-        
-        self.similarities_computed = True
+
+    def _build_graph_scalar_top_k(self, movie_ids: List[int]):
+        # Bounded min-heaps keep at most top_k (weight, neighbour) pairs per
+        # movie while the pairs stream past.
+        heaps = {movie_id: [] for movie_id in movie_ids}
+        for i in range(len(movie_ids)):
+            for j in range(i + 1, len(movie_ids)):
+                movie1_id = movie_ids[i]
+                movie2_id = movie_ids[j]
+                weight = self._pair_similarity(movie1_id, movie2_id)
+                if weight <= 0:
+                    continue
+                for source, target in ((movie1_id, movie2_id), (movie2_id, movie1_id)):
+                    heap = heaps[source]
+                    if len(heap) < self.top_k:
+                        heapq.heappush(heap, (weight, target))
+                    elif weight > heap[0][0]:
+                        heapq.heapreplace(heap, (weight, target))
+
+        for movie_id, heap in heaps.items():
+            for weight, other_id in heap:
+                self.graph[movie_id][other_id] = weight
+
+    def _build_graph_vectorized(self, movie_ids: List[int]):
+        import numpy as np
+        from movie_suggestions.similarity_engine import pack_features, score_block, similarity_matrix
+
+        if self.workers and self.workers > 1 and len(movie_ids) >= self.PARALLEL_MIN_MOVIES:
+            self._build_graph_parallel(movie_ids)
+            return
+
+        if self.top_k is None:
+            scores = similarity_matrix(self, movie_ids)
+            rows, cols = np.nonzero(np.triu(scores > 0, k=1))
+            for i, j in zip(rows.tolist(), cols.tolist()):
+                weight = float(scores[i, j])
+                self.graph[movie_ids[i]][movie_ids[j]] = weight
+                self.graph[movie_ids[j]][movie_ids[i]] = weight
+            return
+
+        k = min(self.top_k, len(movie_ids) - 1)
+        if k <= 0:
+            return
+
+        # Score a block of rows at a time so that only TOP_K_BLOCK_ROWS x n
+        # scores are ever materialised alongside the n x k adjacency.
+        features = pack_features(self, movie_ids)
+        columns = np.arange(len(movie_ids))
+        for start in range(0, len(movie_ids), self.TOP_K_BLOCK_ROWS):
+            rows = columns[start:start + self.TOP_K_BLOCK_ROWS]
+            scores = score_block(features, rows, columns)
+            scores[np.arange(len(rows)), rows] = -np.inf
+            neighbours = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for offset, row in enumerate(neighbours):
+                movie_id = movie_ids[start + offset]
+                for j in row.tolist():
+                    weight = float(scores[offset, j])
+                    if weight > 0:
+                        self.graph[movie_id][movie_ids[j]] = weight
+
+    def _build_graph_parallel(self, movie_ids: List[int]):
+        from movie_suggestions.parallel_scoring import parallel_pairs, parallel_top_k
+        from movie_suggestions.similarity_engine import pack_features
+
+        features = pack_features(self, movie_ids)
+        if self.top_k is None:
+            for rows, cols, weights in parallel_pairs(features, self.workers, self.TOP_K_BLOCK_ROWS):
+                for i, j, weight in zip(rows.tolist(), cols.tolist(), weights.tolist()):
+                    self.graph[movie_ids[i]][movie_ids[j]] = weight
+                    self.graph[movie_ids[j]][movie_ids[i]] = weight
+            return
+
+        k = min(self.top_k, len(movie_ids) - 1)
+        if k <= 0:
+            return
+        for start, neighbours, weights in parallel_top_k(features, k, self.workers, self.TOP_K_BLOCK_ROWS):
+            for offset, (row, row_weights) in enumerate(zip(neighbours.tolist(), weights.tolist())):
+                movie_id = movie_ids[start + offset]
+                for j, weight in zip(row, row_weights):
+                    if weight > 0:
+                        self.graph[movie_id][movie_ids[j]] = weight
 
     def _calculate_genre_weights(self):
         genre_count = defaultdict(int)
@@ -321,21 +1329,27 @@ class MovieSimilarityGraph:
         for genre, count in genre_count.items():
             self.genre_weights[genre] = 1 - (count / total_movies)
 
-    def get_recommendations(self, movie_id: int, limit: int = 20) -> List[Dict]:
+    def get_recommendations(self, movie_id: int, limit: int = 20, use_cache: bool = True) -> List[Dict]:
+        with self.lock:
+            return self._get_recommendations(movie_id, limit, use_cache)
+
+    def _get_recommendations(self, movie_id: int, limit: int, use_cache: bool = True) -> List[Dict]:
         if movie_id not in self.movies:
             return []
 
+        self.touch(movie_id)
         if not self.similarities_computed:
             self.build_graph()
 
         cache_key = f"recommendations_{movie_id}_{limit}"
-        cached_recommendations = cache_manager.search_cache.get(cache_key)
+        cached_recommendations = cache_manager.search_cache.get(cache_key) if use_cache else None
         if cached_recommendations:
             return cached_recommendations
 
         recommendations = []
         if movie_id in self.graph:
-            for other_id in self.graph[movie_id]:
+            neighbours = self.graph[movie_id]
+            for other_id in heapq.nlargest(limit, neighbours, key=neighbours.get):
                 other_movie = self.movies[other_id]
                 
                 year = other_movie.get('year', 0)
@@ -365,4 +1379,30 @@ class MovieSimilarityGraph:
         recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
         recommendations = recommendations[:limit]
         cache_manager.search_cache.put(cache_key, recommendations)
-        return recommendations
\ No newline at end of file
+        return recommendations
+
+_shared_movie_graph = None
+_shared_movie_graph_lock = threading.Lock()
+
+
+def get_shared_movie_graph() -> MovieSimilarityGraph:
+    global _shared_movie_graph
+    if _shared_movie_graph is None:
+        with _shared_movie_graph_lock:
+            if _shared_movie_graph is None:
+                # Only full builds of at least PARALLEL_MIN_MOVIES use the
+                # workers; the few movies each request adds are scored in
+                # this process.
+                workers = int(os.environ.get('KINOLOGIKA_GRAPH_WORKERS') or 0) or None
+                _shared_movie_graph = MovieSimilarityGraph(
+                    top_k=50, max_movies=5000, workers=workers, ann_shortlist=200
+                )
+    return _shared_movie_graph
+
+
+def __getattr__(name):
+    # Keeps `from movie_suggestions.data_structures import shared_movie_graph`
+    # working; the graph is created on first access.
+    if name == 'shared_movie_graph':
+        return get_shared_movie_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
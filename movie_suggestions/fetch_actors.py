@@ -1,88 +1,350 @@
-import requests
-from movie_suggestions.data_structures import Trie, cache_manager
-from myproject.settings import TMDB_API_KEY
+from movie_suggestions.cache_backends import project_file
+from movie_suggestions.data_structures import SearchIndex, cache_manager, movie_trie
+from movie_suggestions.snapshot import DEFAULT_SNAPSHOT_PATH, encode_snapshot, read_snapshot, write_snapshot
+from movie_suggestions.tmdb_client import tmdb_client
+from movie_suggestions.concurrency import TokenBucket
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import atexit
+import json
 import logging
+import os
 import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where every process crawls.
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+AUTOCOMPLETE_LIMIT = 10
+INITIAL_PAGES = 10
+# Credits of the most popular actors are fetched ahead of time so their
+# actor pages need no TMDB round trip.
+PREFETCH_CREDITS_TOP_N = 200
+PREFETCH_SAVE_EVERY = 20
+# Credits and details older than this are fetched again, as the actor cache
+# entries built from them expire after the same time. Until a refetch
+# succeeds the old copy is still served.
+ACTOR_MAX_AGE = 24 * 3600
+
+# TMDB serves at most 500 pages of /person/popular.
+CRAWL_MAX_PAGES = 500
+CRAWL_REQUESTS_PER_SECOND = 2.0
+CRAWL_BACKOFF_SECONDS = 2.0
+CRAWL_MAX_BACKOFF_SECONDS = 300.0
+CRAWL_MAX_FAILURES = 8
+# Each checkpoint writes the actor blob and a full snapshot, so they are
+# spaced by time rather than written every few pages.
+CRAWL_CHECKPOINT_SECONDS = 120
+# A finished crawl is started again once popularity ranks have had time to move.
+CRAWL_REFRESH_SECONDS = 7 * 24 * 3600
+DEFAULT_CHECKPOINT_PATH = project_file('kinologika_actor_crawl.json')
+# The /person/{id} fields the actor details page shows besides name,
+# popularity and movies.
+ACTOR_DETAIL_FIELDS = ('birthday', 'place_of_birth', 'profile_path', 'known_for_department', 'also_known_as')
+
+
+class ActorRecord(NamedTuple):
+    id: int
+    name: str
+    popularity: float
+    known_for: Tuple[str, ...]
+
+
 class ActorMovieManager:
-    def __init__(self):
-        self.actor_trie = Trie()
-        self.actor_movies: Dict[str, List] = {}
-        self.actor_details: Dict[str, Dict] = {}
+    def __init__(self, checkpoint_path: Optional[str] = None, max_pages: int = CRAWL_MAX_PAGES,
+                 snapshot_path: Optional[str] = None):
+        self.actor_index = SearchIndex()
+        self.actor_records: Dict[int, ActorRecord] = {}
+        self.actor_movies: Dict[int, List] = {}
+        self.actor_details: Dict[int, Dict] = {}
+        # When each actor's credits and details were fetched from TMDB.
+        self.movies_fetched: Dict[int, float] = {}
+        self.details_fetched: Dict[int, float] = {}
         self.lock = threading.Lock()  
-        self.stop_fetching = False 
+        self.stop_event = threading.Event()
+        self.checkpoint_path = checkpoint_path or os.environ.get(
+            'KINOLOGIKA_CRAWL_CHECKPOINT', DEFAULT_CHECKPOINT_PATH
+        )
+        self.snapshot_path = snapshot_path or os.environ.get(
+            'KINOLOGIKA_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH
+        )
+        self.max_pages = max_pages
+        self.crawl_budget = TokenBucket(rate=CRAWL_REQUESTS_PER_SECOND, capacity=1)
+        self.restored = False
+        # Crawl progress as of the loaded or last saved snapshot; None when
+        # the data was not restored from a snapshot.
+        self.crawl_state: Optional[Dict] = None
+        self.crawl_lock_file = None
         self._initialize_data()
         self._start_background_fetching()
+        # Titles learned by the movie autocomplete since the last save.
+        atexit.register(self._save_snapshot)
 
     def _initialize_data(self):
+        # A local snapshot loads in milliseconds; the cached blob is the next
+        # best thing. Without either, the index starts empty and is filled
+        # from TMDB in the background.
+        if self._load_snapshot():
+            self.restored = True
+            logger.debug(f"Loaded {len(self.actor_index)} actors from snapshot {self.snapshot_path}")
+            return
+
         cached_data = cache_manager.actor_cache.get('actor_movie_data')
         logger.debug(f"Cached data found: {bool(cached_data)}")
         
-        if cached_data:
+        # Blobs written before actors had records carry no 'records' entry
+        # and are rebuilt from TMDB.
+        if cached_data and 'records' in cached_data:
             self.actor_movies = cached_data.get('movies', {})
             self.actor_details = cached_data.get('actor_details', {})
-            logger.debug(f"Loaded {len(self.actor_movies)} actors from cache")
-            
-            self.actor_trie = Trie()
-            for actor_name in self.actor_movies.keys():
-                self.actor_trie.insert(actor_name.lower()) 
-            
-            logger.debug(f"Populated trie with {len(self.actor_movies)} actors")
+            self.movies_fetched = cached_data.get('movies_fetched', {})
+            self.details_fetched = cached_data.get('details_fetched', {})
+            self.actor_records = {
+                record[0]: ActorRecord(record[0], record[1], record[2], tuple(record[3]))
+                for record in cached_data['records']
+            }
+
+            self.actor_index = SearchIndex()
+            for actor_id, name, popularity, aliases in cached_data['actors']:
+                self.actor_index.add(actor_id, name, popularity, aliases)
+
+            self.restored = True
+            logger.debug(f"Populated index with {len(self.actor_index)} actors")
         else:
-            logger.debug("No cached data found, fetching fresh data")
-            self._fetch_initial_actors()
+            logger.debug("No cached data found, fetching fresh data in the background")
+
+    def _load_snapshot(self) -> bool:
+        state = read_snapshot(self.snapshot_path)
+        if state is None:
+            return False
+        self.actor_index = state['actor_index']
+        self.actor_records = state['actor_records']
+        self.actor_movies = state['actor_movies']
+        self.actor_details = state['actor_details']
+        # Snapshots from before fetch times were kept count as stale.
+        self.movies_fetched = state.get('movies_fetched', {})
+        self.details_fetched = state.get('details_fetched', {})
+        self.crawl_state = state.get('crawl', {})
+        movie_trie.load(state['movie_trie'])
+        return True
+
+    def _save_snapshot(self):
+        # Copies are cheap (the values are replaced, never modified, and the
+        # tries share their nodes), so the locks are held only while copying
+        # and not while pickling.
+        with self.lock:
+            state = {
+                'actor_index': self.actor_index.copy(),
+                'actor_records': dict(self.actor_records),
+                'actor_movies': dict(self.actor_movies),
+                'actor_details': dict(self.actor_details),
+                'movies_fetched': dict(self.movies_fetched),
+                'details_fetched': dict(self.details_fetched),
+                # Saved with the data it describes, so a snapshot written by
+                # another process can never point past its own actors.
+                'crawl': dict(self.crawl_state or {}),
+            }
+        state.update(movie_trie=movie_trie.copy(), created=time.time())
+        data = encode_snapshot(state)
+        if write_snapshot(self.snapshot_path, data):
+            logger.debug(f"Wrote {len(data)} byte snapshot to {self.snapshot_path}")
 
     def _fetch_initial_actors(self):
-        self._fetch_and_cache_actor_data(pages_to_fetch=10) 
+        self._fetch_and_cache_actor_data(pages_to_fetch=INITIAL_PAGES)
 
     def _start_background_fetching(self):
-        thread = threading.Thread(target=self._fetch_additional_actors, daemon=True)
+        thread = threading.Thread(target=self._background_fetch, daemon=True)
         thread.start()
 
+    def _acquire_crawl_lock(self) -> bool:
+        # Every worker process builds a manager, but only the one holding the
+        # lock file prefetches and crawls, so TMDB sees one crawl budget and
+        # the checkpoint has one writer. The lock is released when the
+        # process exits.
+        if fcntl is None:
+            return True
+        try:
+            lock_file = open(f"{self.checkpoint_path}.lock", 'a')
+        except OSError as e:
+            logger.warning(f"Could not open crawl lock {self.checkpoint_path}.lock: {e}")
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self.crawl_lock_file = lock_file
+        return True
+
+    def _background_fetch(self):
+        if not self.restored:
+            self._fetch_initial_actors()
+            self._save_snapshot()
+        if not self._acquire_crawl_lock():
+            logger.debug("Another process is crawling actors; not crawling here")
+            return
+        # /person/popular is ordered by popularity, so the actors worth
+        # prefetching are already known before the crawl goes deeper.
+        if self._prefetch_credits():
+            self._save_snapshot()
+        self._fetch_additional_actors()
+
+    def _prefetch_credits(self, top_n: int = PREFETCH_CREDITS_TOP_N) -> int:
+        with self.lock:
+            pending = [
+                record.id for record in
+                sorted(self.actor_records.values(), key=lambda record: record.popularity, reverse=True)[:top_n]
+                if not self._fresh(self.movies_fetched, record.id, ACTOR_MAX_AGE)
+            ]
+
+        fetched = 0
+        for actor_id in pending:
+            if self.stop_event.is_set():
+                break
+            self.crawl_budget.acquire()
+            movies = self.fetch_actor_movies(actor_id)
+            if movies is None:
+                continue
+            with self.lock:
+                self._store_movies(actor_id, movies)
+                fetched += 1
+                if fetched % PREFETCH_SAVE_EVERY == 0:
+                    self._cache_actor_data()
+        if fetched:
+            with self.lock:
+                self._cache_actor_data()
+        logger.debug(f"Prefetched credits for {fetched} actors")
+        return fetched
+
+    def _load_checkpoint(self) -> Dict:
+        # A snapshot carries its own crawl progress. Otherwise the checkpoint
+        # file describes the actors held in the cached blob, so it is ignored
+        # when the blob was not restored.
+        if self.crawl_state is not None:
+            checkpoint = self.crawl_state
+        elif not self.restored:
+            return {}
+        else:
+            try:
+                with open(self.checkpoint_path) as f:
+                    checkpoint = json.load(f)
+            except FileNotFoundError:
+                return {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable crawl checkpoint {self.checkpoint_path}: {e}")
+                return {}
+        if checkpoint.get('exhausted') and time.time() - checkpoint.get('updated', 0) > CRAWL_REFRESH_SECONDS:
+            return {}
+        return checkpoint
+
+    def _save_checkpoint(self, page: int, exhausted: bool = False):
+        # The actor blob and the snapshot are written first so the checkpoint
+        # never points past data that was persisted.
+        with self.lock:
+            self._cache_actor_data()
+            checkpoint = {
+                'page': page,
+                'exhausted': exhausted,
+                'actors': len(self.actor_index),
+                'updated': time.time(),
+            }
+            self.crawl_state = checkpoint
+        self._save_snapshot()
+        # Per process, so a process that cannot take the crawl lock (or runs
+        # without fcntl) never renames a half-written file into place.
+        temporary = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as f:
+                json.dump(checkpoint, f)
+            os.replace(temporary, self.checkpoint_path)
+        except OSError as e:
+            logger.warning(f"Could not write crawl checkpoint {self.checkpoint_path}: {e}")
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
     def _fetch_additional_actors(self):
-        page = 11 
-        while not self.stop_fetching:
+        checkpoint = self._load_checkpoint()
+        if checkpoint.get('exhausted'):
+            logger.debug(f"Actor crawl finished at page {checkpoint['page']}; not resuming")
+            return
+
+        page = max(checkpoint.get('page', INITIAL_PAGES), INITIAL_PAGES) + 1
+        last_page, exhausted, failures = page - 1, False, 0
+        checkpointed = time.monotonic()
+        while page <= self.max_pages and not self.stop_event.is_set():
+            self.crawl_budget.acquire()
             logger.debug(f"Background fetching actors from page {page}")
             actors = self.fetch_popular_actors(page)
-            if actors:
-                with self.lock: 
-                    for actor in actors:
-                        actor_name = actor['name'].strip().lower()
-                        if actor_name not in self.actor_movies:
-                            self.actor_trie.insert(actor_name)
-                    logger.debug(f"Background fetched {len(actors)} actors from page {page}")
+
+            if actors is None:
+                failures += 1
+                if failures >= CRAWL_MAX_FAILURES:
+                    logger.warning(f"Stopping actor crawl at page {page} after {failures} failures")
+                    break
+                delay = min(CRAWL_MAX_BACKOFF_SECONDS, CRAWL_BACKOFF_SECONDS * 2 ** (failures - 1))
+                self.stop_event.wait(delay)
+                continue
+
+            failures = 0
+            if not actors:
+                exhausted = True
+                break
+
+            with self.lock:
+                for actor in actors:
+                    self._index_actor(actor)
+            logger.debug(f"Background fetched {len(actors)} actors from page {page}")
+            last_page = page
+            if time.monotonic() - checkpointed >= CRAWL_CHECKPOINT_SECONDS:
+                self._save_checkpoint(last_page)
+                checkpointed = time.monotonic()
             page += 1
 
-    def fetch_actor_movies(self, actor_id: int) -> List:
-        url = f'https://api.themoviedb.org/3/person/{actor_id}/movie_credits?api_key={TMDB_API_KEY}'
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                return response.json().get('cast', [])
-        except requests.RequestException:
-            pass
-        return []
-
-    def fetch_popular_actors(self, page: int = 1) -> List:
+        self._save_checkpoint(last_page, exhausted or page > self.max_pages)
+
+    def fetch_actor_movies(self, actor_id: int) -> Optional[List]:
+        data = tmdb_client.get_json(f'/person/{actor_id}/movie_credits', timeout=5)
+        if data is None:
+            return None
+        return self._compact_credits(data.get('cast', []))
+
+    @staticmethod
+    def _compact_credits(cast: List[Dict]) -> List[Dict]:
+        # Only the fields the actor pages use are kept.
+        return [
+            {
+                'id': movie['id'],
+                'title': movie.get('title', ''),
+                'release_date': movie.get('release_date', ''),
+                'character': movie.get('character', ''),
+                'poster_path': movie.get('poster_path'),
+            }
+            for movie in cast
+            if 'id' in movie
+        ]
+
+    def fetch_popular_actors(self, page: int = 1) -> Optional[List]:
+        # None means the request failed; an empty list means TMDB has no
+        # more pages.
         cache_key = f'popular_actors_page_{page}'
         cached_actors = cache_manager.actor_cache.get(cache_key)
         if cached_actors:
             return cached_actors
 
-        url = f'https://api.themoviedb.org/3/person/popular?page={page}&api_key={TMDB_API_KEY}'
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                actors = response.json().get('results', [])
-                cache_manager.actor_cache.put(cache_key, actors)
-                return actors
-        except requests.RequestException:
-            pass
-        return []
+        data = tmdb_client.get_json('/person/popular', {'page': page}, timeout=5)
+        if data is None:
+            return None
+        actors = data.get('results', [])
+        if actors:
+            cache_manager.actor_cache.put(cache_key, actors)
+        return actors
 
     def _fetch_and_cache_actor_data(self, pages_to_fetch: int):
         all_actors = []
@@ -91,7 +353,7 @@ class ActorMovieManager:
             for future in as_completed(futures):
                 page = futures[future]
                 try:
-                    actors = future.result()
+                    actors = future.result() or []
                     all_actors.extend(actors)
                     logger.debug(f"Fetched {len(actors)} actors from page {page}")
                 except Exception as e:
@@ -99,83 +361,138 @@ class ActorMovieManager:
 
         with self.lock:
             for actor in all_actors:
-                actor_name = actor['name'].strip().lower()
-                self.actor_trie.insert(actor_name)
+                self._index_actor(actor)
 
-            cache_manager.actor_cache.put('actor_movie_data', {
-                'movies': self.actor_movies,
-                'actor_details': self.actor_details
-            })
+            self._cache_actor_data()
             logger.debug(f"Cached {len(self.actor_movies)} actor-movie relationships and {len(self.actor_details)} actor details")
 
+    def _index_actor(self, actor: Dict):
+        name = actor['name'].strip()
+        popularity = actor.get('popularity') or 0.0
+        self.actor_index.add(actor['id'], name, popularity, actor.get('also_known_as') or ())
+
+        # /person/popular lists known_for titles; /person/{id} does not, so
+        # the titles already recorded are kept.
+        known_for = tuple(
+            item['title'] for item in actor.get('known_for') or ()
+            if item.get('media_type', 'movie') == 'movie' and item.get('title')
+        )
+        previous = self.actor_records.get(actor['id'])
+        if not known_for and previous is not None:
+            known_for = previous.known_for
+        self.actor_records[actor['id']] = ActorRecord(actor['id'], name, popularity, known_for)
+
+    def _cache_actor_data(self):
+        cache_manager.actor_cache.put('actor_movie_data', {
+            'movies': self.actor_movies,
+            'actor_details': self.actor_details,
+            'movies_fetched': self.movies_fetched,
+            'details_fetched': self.details_fetched,
+            'actors': self.actor_index.entries(),
+            'records': [tuple(record) for record in self.actor_records.values()],
+        })
+
     def stop_background_fetching(self):
-       self.stop_fetching = True
+        self.stop_event.set()
 
 
-    def search_actors(self, prefix: str) -> List[Tuple[str, List]]:
-        prefix = prefix.strip().lower()
+    def search_actors(self, prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> List[ActorRecord]:
         logger.debug(f"Searching for actors with prefix: {prefix}")
-        
-        logger.debug(f"Trie node count: {len(self.actor_trie.root.children)}")
-        
-        matching_actors = self.actor_trie.search_prefix(prefix)
-        logger.debug(f"Found {len(matching_actors)} matching actors")
-        
-        results = [(actor, self.actor_movies.get(actor, [])) for actor in matching_actors]
-        logger.debug(f"First few results: {results[:3]}")
-        
+
+        results = [self.actor_records[actor_id]
+                   for actor_id in self.actor_index.search(prefix, limit)
+                   if actor_id in self.actor_records]
+        logger.debug(f"Found {len(results)} matching actors")
         return results
 
-    def get_actor_movies(self, actor_name: str) -> List:
-        if actor_name in self.actor_movies:
-            return self.actor_movies[actor_name]
+    @staticmethod
+    def _fresh(fetched: Dict[int, float], actor_id: int, max_age: float) -> bool:
+        return time.time() - fetched.get(actor_id, 0) < max_age
+
+    def _store_movies(self, actor_id: int, movies: List):
+        self.actor_movies[actor_id] = movies
+        self.movies_fetched[actor_id] = time.time()
+
+    def get_actor_movies(self, actor_name: str, max_age: float = ACTOR_MAX_AGE) -> List:
+        # Known actors resolve to their TMDB id locally; only unknown names
+        # need a person search first.
+        matches = self.actor_index.lookup(actor_name)
+        if matches:
+            actor_id = matches[0]
+        else:
+            data = tmdb_client.get_json(
+                '/search/person', {'query': actor_name, 'language': 'en-US'}, timeout=5
+            )
+            actor_data = data.get('results', []) if data else []
+            if not actor_data:
+                return []
+            actor_id = actor_data[0]['id']
+
+        if actor_id in self.actor_movies and self._fresh(self.movies_fetched, actor_id, max_age):
+            return self.actor_movies[actor_id]
+        movies = self.fetch_actor_movies(actor_id)
+        if movies is None:
+            return self.actor_movies.get(actor_id, [])
+        with self.lock:
+            self._store_movies(actor_id, movies)
+        return movies
+
+    def get_actor_details(self, actor_name: str, max_age: float = ACTOR_MAX_AGE) -> Optional[Dict]:
+        # Details and movies of an actor the index knows, kept with the rest
+        # of the actor data and fetched again once older than max_age. None
+        # for names the index does not know.
+        matches = self.actor_index.lookup(actor_name)
+        if not matches:
+            return None
+        actor_id = matches[0]
+        known = actor_id in self.actor_details and actor_id in self.actor_movies
+        if (known and self._fresh(self.details_fetched, actor_id, max_age)
+                and self._fresh(self.movies_fetched, actor_id, max_age)):
+            return self._actor_details(actor_id)
+
+        data = tmdb_client.get_json(
+            f'/person/{actor_id}', {'append_to_response': 'movie_credits'}, timeout=5
+        )
+        if not data or 'id' not in data:
+            logger.debug(f"Error fetching actor details for {actor_name}")
+            return self._actor_details(actor_id) if known else None
+        return self.add_actor_details(data)
+
+    def add_actor_details(self, data: Dict) -> Dict:
+        # `data` is a /person/{id} response with movie_credits appended. Its
+        # also_known_as names are indexed too, so they find the same person.
+        details = {field: data.get(field) for field in ACTOR_DETAIL_FIELDS}
+        movies = self._compact_credits((data.get('movie_credits') or {}).get('cast', []))
+        with self.lock:
+            self._index_actor(data)
+            self.actor_details[data['id']] = details
+            self.details_fetched[data['id']] = time.time()
+            self._store_movies(data['id'], movies)
+            return self._actor_details(data['id'])
+
+    def _actor_details(self, actor_id: int) -> Dict:
+        record = self.actor_records[actor_id]
+        return dict(
+            self.actor_details[actor_id], id=actor_id, name=record.name,
+            popularity=record.popularity, movies=self.actor_movies[actor_id],
+        )
+
+_actor_manager = None
+_actor_manager_lock = threading.Lock()
+
+
+def get_actor_manager() -> ActorMovieManager:
+    # Created on first use, so importing this module starts no threads and
+    # reads no files.
+    global _actor_manager
+    if _actor_manager is None:
+        with _actor_manager_lock:
+            if _actor_manager is None:
+                _actor_manager = ActorMovieManager()
+    return _actor_manager
 
-        url = f'https://api.themoviedb.org/3/search/person?query={actor_name}&language=en-US&api_key={TMDB_API_KEY}'
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                actor_data = response.json().get('results', [])
-                if actor_data:
-                    actor_id = actor_data[0]['id']
-                    movies = self.fetch_actor_movies(actor_id)
-                    self.actor_movies[actor_name] = movies
-                    return movies
-        except requests.RequestException:
-            pass
-        return []
-
-    def get_actor_details(self, actor_name: str):
-        if actor_name in self.actor_details:
-            logger.debug(f"Returning cached details for actor: {actor_name}")
-            return self.actor_details[actor_name]
-        
-        url = f'https://api.themoviedb.org/3/search/person?query={actor_name}&language=en-US&api_key={TMDB_API_KEY}'
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                actor_data = response.json().get('results', [])
-                if actor_data:
-                    actor_details = actor_data[0] 
-                    actor_id = actor_details['id']
-                    actor_name = actor_details['name']
-           
-                    details_url = f'https://api.themoviedb.org/3/person/{actor_id}?api_key={TMDB_API_KEY}'
-                    details_response = requests.get(details_url)
-                    if details_response.status_code == 200:
-                        detailed_info = details_response.json()
-                        self.actor_details[actor_name] = detailed_info
-                        cache_manager.actor_cache.put('actor_movie_data', {
-                            'movies': self.actor_movies,
-                            'actor_details': self.actor_details 
-                        })
-                        return detailed_info
-                else:
-                    logger.debug(f"No actor found for {actor_name}")
-            else:
-                logger.debug(f"Error from TMDB API: {response.status_code}")
-        except requests.RequestException as e:
-            logger.error(f"Error fetching actor details: {e}")
-        
-        return {} 
 
-actor_manager = ActorMovieManager()
+def __getattr__(name):
+    if name == 'actor_manager':
+        return get_actor_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,98 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movie_suggestions.recommendation_store import get_recommendation_store
+from movie_suggestions.tmdb_client import tmdb_client
+
+POPULAR_PAGE_SIZE = 20
+# TMDB serves at most 500 pages of /movie/popular.
+POPULAR_MAX_PAGES = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute recommendation lists for the given TMDB movie ids, or the most popular "
+        "movies, and store them for MovieRecommendationsView to serve directly. Movies "
+        "with a fresh stored list are skipped, so an interrupted run can simply be restarted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('movie_ids', nargs='*', type=int, help="TMDB movie ids")
+        parser.add_argument('--popular', type=int, default=0, metavar='N',
+                            help="also precompute the N most popular movies on TMDB")
+        parser.add_argument('--workers', type=int, default=4,
+                            help="movies computed concurrently (default: 4)")
+        parser.add_argument('--force', action='store_true',
+                            help="recompute movies that already have a fresh list")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        movie_ids = list(dict.fromkeys(options['movie_ids'] + self.popular_movie_ids(options['popular'])))
+        if not movie_ids:
+            raise CommandError("Give TMDB movie ids or --popular N")
+
+        store = get_recommendation_store()
+        if not options['force']:
+            fresh = store.fresh_ids(movie_ids)
+            if fresh:
+                self.stdout.write(f"Skipping {len(fresh)} movies with fresh recommendations")
+            movie_ids = [movie_id for movie_id in movie_ids if movie_id not in fresh]
+        if not movie_ids:
+            self.stdout.write(self.style.SUCCESS("Nothing to do"))
+            return
+
+        # Imported here so that the command's --help does not load the views.
+        from myproject.views import MovieRecommendationsView
+
+        view = MovieRecommendationsView()
+        started = time.perf_counter()
+        stored = failed = 0
+        self.stdout.write(f"Precomputing recommendations for {len(movie_ids)} movies "
+                          f"with {options['workers']} workers")
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(view.compute_recommendations, str(movie_id), f"recommendations_{movie_id}", True): movie_id
+                for movie_id in movie_ids
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                movie_id = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    response = {"success": False, "message": str(e)}
+
+                # Failures are not stored, so the next run retries them.
+                if response.get("success"):
+                    store.put(movie_id, response)
+                    stored += 1
+                    outcome = f"{len(response['recommendations'])} recommendations"
+                else:
+                    failed += 1
+                    outcome = self.style.WARNING(response.get("message", "failed"))
+
+                elapsed = time.perf_counter() - started
+                remaining = elapsed / done * (len(movie_ids) - done)
+                self.stdout.write(f"[{done}/{len(movie_ids)}] {movie_id}: {outcome} "
+                                  f"({elapsed:.0f}s elapsed, ~{remaining:.0f}s left)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} recommendation lists, {failed} failed, in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def popular_movie_ids(self, count):
+        movie_ids = []
+        for page in range(1, min(math.ceil(count / POPULAR_PAGE_SIZE), POPULAR_MAX_PAGES) + 1):
+            data = tmdb_client.get_json('/movie/popular', {'language': 'en-US', 'page': page})
+            if data is None:
+                raise CommandError(f"Could not fetch page {page} of popular movies from TMDB")
+            results = data.get('results', [])
+            movie_ids.extend(movie['id'] for movie in results)
+            if not results:
+                break
+        return movie_ids[:count]
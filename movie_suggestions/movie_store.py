@@ -0,0 +1,174 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from movie_suggestions.cache_backends import project_file, sqlite_connection
+from movie_suggestions.concurrency import tmdb_single_flight
+from movie_suggestions.data_structures import normalize_key
+from movie_suggestions.tmdb_client import tmdb_client
+
+DEFAULT_MOVIES_PATH = project_file('kinologika_movies.sqlite3')
+# Records older than this are fetched again; until the fetch succeeds the old
+# record is still served.
+MOVIE_MAX_AGE = 7 * 86400
+MOVIE_CAST_LIMIT = 10
+# Joins the names in the list columns; it cannot occur in a TMDB name.
+LIST_SEPARATOR = '\x1f'
+
+
+class MovieRecord(NamedTuple):
+    id: int
+    title: str
+    year: Optional[int]
+    release_date: Optional[str]
+    overview: str
+    poster_path: Optional[str]
+    vote_average: float
+    popularity: float
+    runtime: Optional[int]
+    budget: int
+    revenue: int
+    director: Optional[str]
+    genres: Tuple[str, ...]
+    cast: Tuple[str, ...]
+    keywords: Tuple[str, ...]
+
+
+LIST_FIELDS = ('genres', 'cast', 'keywords')
+# Quoted, as CAST is an SQL keyword.
+_COLUMNS = ', '.join(f'"{field}"' for field in MovieRecord._fields)
+
+
+def record_from_tmdb(data: Dict[str, Any]) -> MovieRecord:
+    # `data` is a /movie/{id} response with credits and keywords appended.
+    credits = data.get('credits') or {}
+    release_date = data.get('release_date') or None
+    try:
+        year = int(release_date.split('-')[0]) if release_date else None
+    except ValueError:
+        year = None
+    cast = sorted(credits.get('cast', []), key=lambda member: member.get('order', MOVIE_CAST_LIMIT))
+
+    return MovieRecord(
+        id=data['id'],
+        title=data.get('title') or 'Unknown Title',
+        year=year,
+        release_date=release_date,
+        overview=data.get('overview') or '',
+        poster_path=data.get('poster_path'),
+        vote_average=data.get('vote_average') or 0.0,
+        popularity=data.get('popularity') or 0.0,
+        runtime=data.get('runtime') or None,
+        budget=data.get('budget') or 0,
+        revenue=data.get('revenue') or 0,
+        director=next(
+            (crew['name'] for crew in credits.get('crew', []) if crew.get('job') == 'Director'), None
+        ),
+        genres=tuple(genre['name'] for genre in data.get('genres', [])),
+        cast=tuple(member['name'] for member in cast[:MOVIE_CAST_LIMIT]),
+        keywords=tuple(keyword['name'] for keyword in (data.get('keywords') or {}).get('keywords', [])),
+    )
+
+
+class MovieStore:
+    # One row per movie with the details, credits and keywords both movie
+    # views need, so each movie is fetched from TMDB once per MOVIE_MAX_AGE.
+    def __init__(self, path: str = DEFAULT_MOVIES_PATH, max_age: float = MOVIE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.local = threading.local()
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS movies ('
+            ' id INTEGER PRIMARY KEY, title TEXT NOT NULL, year INTEGER, release_date TEXT,'
+            ' overview TEXT NOT NULL, poster_path TEXT, vote_average REAL NOT NULL,'
+            ' popularity REAL NOT NULL, runtime INTEGER, budget INTEGER NOT NULL,'
+            ' revenue INTEGER NOT NULL, director TEXT, genres TEXT NOT NULL,'
+            ' "cast" TEXT NOT NULL, keywords TEXT NOT NULL,'
+            ' title_key TEXT NOT NULL, fetched REAL NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS movies_title ON movies (title_key, year)')
+        connection.execute('CREATE INDEX IF NOT EXISTS movies_year ON movies (year)')
+
+    def _connection(self) -> sqlite3.Connection:
+        return sqlite_connection(self.path, self.local)
+
+    @staticmethod
+    def _record(row) -> MovieRecord:
+        record = MovieRecord(*row)
+        return record._replace(**{
+            field: tuple(getattr(record, field).split(LIST_SEPARATOR)) if getattr(record, field) else ()
+            for field in LIST_FIELDS
+        })
+
+    def get(self, movie_id: int, max_age: Optional[float] = None) -> Optional[MovieRecord]:
+        max_age = self.max_age if max_age is None else max_age
+        row = self._connection().execute(
+            f'SELECT {_COLUMNS} FROM movies WHERE id = ? AND fetched >= ?',
+            (movie_id, time.time() - max_age),
+        ).fetchone()
+        return self._record(row) if row else None
+
+    def find(self, title: str, year: Optional[int] = None) -> List[MovieRecord]:
+        # Movies whose title normalises to the same key, most popular first.
+        query = f'SELECT {_COLUMNS} FROM movies WHERE title_key = ?'
+        params = [normalize_key(title)]
+        if year is not None:
+            query += ' AND year = ?'
+            params.append(year)
+        rows = self._connection().execute(query + ' ORDER BY popularity DESC', params)
+        return [self._record(row) for row in rows]
+
+    def put(self, record: MovieRecord) -> None:
+        values = record._replace(**{
+            field: LIST_SEPARATOR.join(getattr(record, field)) for field in LIST_FIELDS
+        })
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO movies ({_COLUMNS}, title_key, fetched)"
+            f" VALUES ({', '.join('?' * (len(MovieRecord._fields) + 2))})",
+            (*values, normalize_key(record.title), time.time()),
+        )
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+
+
+_movie_store = None
+_movie_store_lock = threading.Lock()
+
+
+def get_movie_store() -> MovieStore:
+    global _movie_store
+    if _movie_store is None:
+        with _movie_store_lock:
+            if _movie_store is None:
+                _movie_store = MovieStore(os.environ.get('KINOLOGIKA_MOVIES_PATH', DEFAULT_MOVIES_PATH))
+    return _movie_store
+
+
+def get_movie(movie_id) -> Optional[MovieRecord]:
+    try:
+        movie_id = int(movie_id)
+    except (TypeError, ValueError):
+        return None
+
+    record = get_movie_store().get(movie_id)
+    if record is not None:
+        return record
+    return tmdb_single_flight.do(f"movie_record_{movie_id}", _fetch_movie, movie_id)
+
+
+def _fetch_movie(movie_id: int) -> Optional[MovieRecord]:
+    store = get_movie_store()
+    data = tmdb_client.get_json(
+        f"/movie/{movie_id}", {"language": "en-US", "append_to_response": "credits,keywords"}
+    )
+    if not data or 'id' not in data:
+        # TMDB failed or does not know the movie; a stale record beats none.
+        return store.get(movie_id, max_age=math.inf)
+    record = record_from_tmdb(data)
+    store.put(record)
+    return record
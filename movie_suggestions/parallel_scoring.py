@@ -0,0 +1,140 @@
+import atexit
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from movie_suggestions.similarity_engine import score_block
+
+# Blocks of the similarity matrix are scored in worker processes. The packed
+# feature arrays are written once as .npy files (to /dev/shm where available)
+# and every worker memory-maps them, so a block task only carries file paths
+# and row bounds instead of a pickled copy of the features.
+
+SPARSE_PARTS = ('data', 'indices', 'indptr')
+SHARED_DIRECTORY = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+# Worker side: the features of the most recently published set.
+_loaded: Dict[str, Any] = {}
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    # Pools are kept for the life of the process; spawning avoids forking a
+    # multi-threaded web worker and only imports numpy, scipy and this module.
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            _executors[workers] = executor
+        return executor
+
+
+@atexit.register
+def _shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+@contextmanager
+def published(features: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    directory = tempfile.mkdtemp(prefix='kinologika-features-', dir=SHARED_DIRECTORY)
+    try:
+        descriptor = {'token': directory}
+        for name, value in features.items():
+            if sp.issparse(value):
+                value = value.tocsr()
+                # Workers map the arrays copy-on-write, so fix the index order
+                # here rather than let scipy sort a mapped array.
+                value.sort_indices()
+                paths = {}
+                for part in SPARSE_PARTS:
+                    paths[part] = os.path.join(directory, f'{name}.{part}.npy')
+                    np.save(paths[part], getattr(value, part))
+                descriptor[name] = ('csr', paths, value.shape)
+            else:
+                path = os.path.join(directory, f'{name}.npy')
+                np.save(path, np.ascontiguousarray(value))
+                descriptor[name] = ('dense', path)
+        yield descriptor
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _load(descriptor: Dict[str, Any]) -> Dict[str, Any]:
+    token = descriptor['token']
+    if token not in _loaded:
+        _loaded.clear()
+        features = {}
+        for name, entry in descriptor.items():
+            if name == 'token':
+                continue
+            if entry[0] == 'csr':
+                data, indices, indptr = (np.load(entry[1][part], mmap_mode='c') for part in SPARSE_PARTS)
+                features[name] = sp.csr_matrix((data, indices, indptr), shape=entry[2])
+            else:
+                features[name] = np.load(entry[1], mmap_mode='c')
+        _loaded[token] = features
+    return _loaded[token]
+
+
+def _score_rows(descriptor: Dict[str, Any], start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+    features = _load(descriptor)
+    columns = np.arange(len(features['directors']))
+    rows = columns[start:stop]
+    scores = score_block(features, rows, columns)
+    scores[np.arange(len(rows)), rows] = -np.inf
+    return rows, scores
+
+
+def _top_k_block(descriptor, start: int, stop: int, k: int):
+    rows, scores = _score_rows(descriptor, start, stop)
+    neighbours = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return start, neighbours, np.take_along_axis(scores, neighbours, axis=1)
+
+
+def _pairs_block(descriptor, start: int, stop: int):
+    # Upper triangle only; the caller mirrors each edge.
+    rows, scores = _score_rows(descriptor, start, stop)
+    i, j = np.nonzero((scores > 0) & (np.arange(scores.shape[1])[None, :] > rows[:, None]))
+    return rows[i], j, scores[i, j]
+
+
+def _blocks(n: int, workers: int, max_rows: int):
+    # Several blocks per worker so that uneven blocks still balance.
+    rows = max(1, min(max_rows, math.ceil(n / (workers * 4))))
+    return [(start, min(start + rows, n)) for start in range(0, n, rows)]
+
+
+def parallel_top_k(features: Dict[str, Any], k: int, workers: int, max_rows: int = 256):
+    n = len(features['directors'])
+    with published(features) as descriptor:
+        executor = get_executor(workers)
+        futures = [executor.submit(_top_k_block, descriptor, start, stop, k)
+                   for start, stop in _blocks(n, workers, max_rows)]
+        for future in futures:
+            yield future.result()
+
+
+def parallel_pairs(features: Dict[str, Any], workers: int, max_rows: int = 256):
+    n = len(features['directors'])
+    with published(features) as descriptor:
+        executor = get_executor(workers)
+        futures = [executor.submit(_pairs_block, descriptor, start, stop)
+                   for start, stop in _blocks(n, workers, max_rows)]
+        for future in futures:
+            yield future.result()
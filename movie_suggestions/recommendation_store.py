@@ -0,0 +1,75 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from movie_suggestions.cache_backends import project_file, sqlite_connection
+
+DEFAULT_RECOMMENDATIONS_PATH = project_file('kinologika_recommendations.sqlite3')
+# Precomputed lists older than this are ignored by the view and recomputed by
+# the next precompute_recommendations run.
+RECOMMENDATIONS_MAX_AGE = 3 * 86400
+
+
+class RecommendationStore:
+    # Recommendation responses computed offline by the precompute_recommendations
+    # management command, one JSON document per seed movie.
+    def __init__(self, path: str = DEFAULT_RECOMMENDATIONS_PATH, max_age: float = RECOMMENDATIONS_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.local = threading.local()
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS recommendations ('
+            ' movie_id INTEGER PRIMARY KEY, response TEXT NOT NULL, computed REAL NOT NULL)'
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        return sqlite_connection(self.path, self.local)
+
+    def get(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            'SELECT response FROM recommendations WHERE movie_id = ? AND computed >= ?',
+            (movie_id, time.time() - self.max_age),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, movie_id: int, response: Dict[str, Any]) -> None:
+        self._connection().execute(
+            'INSERT OR REPLACE INTO recommendations (movie_id, response, computed) VALUES (?, ?, ?)',
+            (movie_id, json.dumps(response), time.time()),
+        )
+
+    def fresh_ids(self, movie_ids: Iterable[int]) -> Set[int]:
+        # The subset of movie_ids with a list younger than max_age.
+        cutoff = time.time() - self.max_age
+        fresh = set()
+        movie_ids = list(movie_ids)
+        for start in range(0, len(movie_ids), 500):
+            chunk = movie_ids[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT movie_id FROM recommendations WHERE computed >= ?"
+                f" AND movie_id IN ({', '.join('?' * len(chunk))})",
+                (cutoff, *chunk),
+            )
+            fresh.update(movie_id for movie_id, in rows)
+        return fresh
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM recommendations').fetchone()[0]
+
+
+_recommendation_store = None
+_recommendation_store_lock = threading.Lock()
+
+
+def get_recommendation_store() -> RecommendationStore:
+    global _recommendation_store
+    if _recommendation_store is None:
+        with _recommendation_store_lock:
+            if _recommendation_store is None:
+                _recommendation_store = RecommendationStore(
+                    os.environ.get('KINOLOGIKA_RECOMMENDATIONS_PATH', DEFAULT_RECOMMENDATIONS_PATH)
+                )
+    return _recommendation_store
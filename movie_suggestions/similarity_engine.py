@@ -0,0 +1,181 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import scipy.sparse as sp
+
+# Batched counterpart of MovieSimilarityGraph.calculate_similarity. Movies are
+# packed once into incidence matrices and numeric columns, and any block of the
+# similarity matrix is then produced with array operations. The weights below
+# mirror the scalar path term by term so both engines give the same scores.
+
+UNKNOWN_DIRECTOR = 'Unknown Director'
+
+
+def _incidence(rows: List[Dict[Any, float]], vocab: Dict[Any, int]) -> sp.csr_matrix:
+    data, indices, indptr = [], [], [0]
+    for row in rows:
+        for item, value in row.items():
+            indices.append(vocab[item])
+            data.append(value)
+        indptr.append(len(indices))
+    return sp.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+        shape=(len(rows), len(vocab)),
+    )
+
+
+def _vocabulary(items) -> Dict[Any, int]:
+    vocab = {}
+    for item in items:
+        if item not in vocab:
+            vocab[item] = len(vocab)
+    return vocab
+
+
+def pack_features(graph, movie_ids: List[int]) -> Dict[str, Any]:
+    graph._update_plot_index()
+    movies = [graph.movies[mid] for mid in movie_ids]
+    n = len(movies)
+
+    genre_vocab = _vocabulary(g for movie in movies for g in sorted(movie['genres']))
+    genres = np.zeros((n, len(genre_vocab)))
+    for row, movie in enumerate(movies):
+        for genre in movie['genres']:
+            genres[row, genre_vocab[genre]] = 1.0
+    genre_relation = np.eye(len(genre_vocab))
+    for genre, related in graph.genre_hierarchy.items():
+        if genre not in genre_vocab:
+            continue
+        for other in related:
+            if other in genre_vocab and other != genre:
+                i, j = genre_vocab[genre], genre_vocab[other]
+                genre_relation[i, j] = genre_relation[j, i] = 0.5
+
+    keyword_vocab = _vocabulary(k for movie in movies for k in sorted(movie['keywords']))
+    keywords = _incidence([dict.fromkeys(m['keywords'], 1.0) for m in movies], keyword_vocab)
+
+    # Cast positions are stored 1-based so that the lead actor is not an
+    # implicit zero of the sparse matrix.
+    cast_rows = []
+    for movie in movies:
+        positions = {}
+        for position, actor in enumerate(movie['cast']):
+            positions.setdefault(actor, float(position + 1))
+        cast_rows.append(positions)
+    cast_vocab = _vocabulary(a for row in cast_rows for a in row)
+    cast = _incidence(cast_rows, cast_vocab)
+
+    director_vocab = _vocabulary(
+        m['director'] for m in movies if m['director'] != UNKNOWN_DIRECTOR
+    )
+    directors = np.array(
+        [director_vocab.get(m['director'], -1) if m['director'] != UNKNOWN_DIRECTOR else -1
+         for m in movies],
+        dtype=np.int64,
+    )
+
+    if graph._plot_matrix is not None:
+        located = [(row, graph._plot_index[mid]) for row, mid in enumerate(movie_ids)
+                   if mid in graph._plot_index]
+        selector = sp.csr_matrix(
+            (np.ones(len(located)), ([r for r, _ in located], [c for _, c in located])),
+            shape=(n, graph._plot_matrix.shape[0]),
+        )
+        plot = (selector @ graph._plot_matrix).tocsr()
+    else:
+        plot = sp.csr_matrix((n, 1))
+
+    moods = list(graph.mood_indicators.keys())
+
+    return {
+        'genres': genres,
+        'genre_counts': genres.sum(axis=1),
+        'genre_relation': genre_relation,
+        'keywords': keywords,
+        'cast': cast,
+        'directors': directors,
+        'temporal_rating': np.array([graph.calculate_temporal_rating(m) for m in movies], dtype=np.float64),
+        'runtime': np.array(
+            [np.nan if m.get('runtime') is None else m['runtime'] for m in movies], dtype=np.float64
+        ),
+        'mood': np.array([[m['mood_scores'][mood] for mood in moods] for m in movies], dtype=np.float64)
+                .reshape(n, len(moods)),
+        'year': np.array([m['year'] for m in movies], dtype=np.float64),
+        'popularity': np.array([m['popularity'] for m in movies], dtype=np.float64),
+        'plot': plot,
+    }
+
+
+def _cast_scores(cast_rows: sp.csr_matrix, cast_cols: sp.csr_matrix) -> np.ndarray:
+    # For every shared actor the scalar path adds 1 / (1 + min(pos1, pos2)).
+    # With N_t the number of shared actors whose best position is <= t, that
+    # sum telescopes into sum_t (f(t) - f(t + 1)) * N_t with f(t) = 1 / (1 + t).
+    result = np.zeros((cast_rows.shape[0], cast_cols.shape[0]))
+    if cast_rows.nnz == 0 or cast_cols.nnz == 0:
+        return result
+
+    present_rows = cast_rows.copy()
+    present_rows.data = np.ones_like(present_rows.data)
+    present_cols = cast_cols.copy()
+    present_cols.data = np.ones_like(present_cols.data)
+
+    levels = int(max(cast_rows.data.max(), cast_cols.data.max()))
+    for t in range(levels):
+        within_rows = cast_rows.copy()
+        within_rows.data = (within_rows.data <= t + 1).astype(np.float64)
+        within_cols = cast_cols.copy()
+        within_cols.data = (within_cols.data <= t + 1).astype(np.float64)
+
+        shared = (within_rows @ present_cols.T + present_rows @ within_cols.T
+                  - within_rows @ within_cols.T).toarray()
+        weight = 1 / (1 + t) - (1 / (2 + t) if t + 1 < levels else 0)
+        result += weight * shared
+    return result
+
+
+def score_block(features: Dict[str, Any], rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    score = np.zeros((len(rows), len(cols)))
+
+    genres = features['genres']
+    overlap = genres[rows] @ features['genre_relation'] @ genres[cols].T
+    denominator = np.maximum.outer(features['genre_counts'][rows], features['genre_counts'][cols])
+    score += 3 * np.divide(overlap, denominator, out=np.zeros_like(overlap), where=denominator > 0)
+
+    keywords = features['keywords']
+    score += 2 * (keywords[rows] @ keywords[cols].T).toarray()
+
+    cast = features['cast']
+    score += 2 * _cast_scores(cast[rows], cast[cols])
+
+    directors = features['directors']
+    same_director = (directors[rows][:, None] == directors[cols][None, :]) & (directors[rows][:, None] >= 0)
+    score += 2 * same_director
+
+    rating_diff = np.abs(np.subtract.outer(features['temporal_rating'][rows], features['temporal_rating'][cols]))
+    score += 2 * (1 - (rating_diff / 10) ** 2)
+
+    runtime_diff = np.abs(np.subtract.outer(features['runtime'][rows], features['runtime'][cols]))
+    with np.errstate(invalid='ignore'):
+        runtime_score = np.maximum(0, 1 - (runtime_diff / 30) ** 2)
+    score += np.nan_to_num(runtime_score, nan=0.0)
+
+    plot = features['plot']
+    score += 2 * (plot[rows] @ plot[cols].T).toarray()
+
+    mood = features['mood']
+    mood_diff = np.abs(mood[rows][:, None, :] - mood[cols][None, :, :]).mean(axis=2)
+    score += 2 * (1 - mood_diff)
+
+    year_diff = np.abs(np.subtract.outer(features['year'][rows], features['year'][cols]))
+    score += 0.9 ** year_diff
+
+    pop_diff = np.abs(np.subtract.outer(features['popularity'][rows], features['popularity'][cols]))
+    score += 1 - np.minimum(pop_diff / 100, 1)
+
+    return score
+
+
+def similarity_matrix(graph, movie_ids: List[int]) -> np.ndarray:
+    features = pack_features(graph, movie_ids)
+    index = np.arange(len(movie_ids))
+    return score_block(features, index, index)
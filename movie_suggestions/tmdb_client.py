@@ -0,0 +1,111 @@
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from movie_suggestions.concurrency import TokenBucket, tmdb_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+
+
+class TMDBClient:
+    def __init__(self, api_key: str, base_url: str = TMDB_BASE_URL,
+                 pool_size: int = 20, timeout: float = 10.0, connect_timeout: float = 3.05,
+                 retries: int = 3, backoff_factor: float = 0.5,
+                 rate_limiter: Optional[TokenBucket] = tmdb_rate_limiter):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, timeout)
+        self.rate_limiter = rate_limiter
+
+        # Keep-alive connections are reused across calls and threads; retries
+        # back off exponentially and honour Retry-After on 429 responses.
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        return re.sub(r'/\d+', '/{id}', path)
+
+    def _record(self, endpoint: str, elapsed: float, failed: bool):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                endpoint, {'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+            )
+            stats['calls'] += 1
+            stats['errors'] += int(failed)
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None) -> requests.Response:
+        query = {'api_key': self.api_key}
+        query.update(params or {})
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.get(
+                f"{self.base_url}{path}", params=query, timeout=timeout or self.timeout
+            )
+            failed = response.status_code != 200
+            return response
+        finally:
+            self._record(self._endpoint(path), time.perf_counter() - start, failed)
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> Optional[Dict]:
+        try:
+            response = self.get(path, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            logger.warning(f"TMDB request to {path} failed: {e}")
+            return None
+
+        if response.status_code != 200:
+            logger.debug(f"TMDB returned {response.status_code} for {path}")
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            logger.warning(f"TMDB returned invalid JSON for {path}")
+            return None
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._stats_lock:
+            return {
+                endpoint: dict(stats, avg_ms=stats['total_seconds'] * 1000 / stats['calls'])
+                for endpoint, stats in self._stats.items()
+            }
+
+
+tmdb_client = TMDBClient(
+    api_key=settings.TMDB_API_KEY,
+    base_url=getattr(settings, 'TMDB_BASE_URL', TMDB_BASE_URL),
+    pool_size=getattr(settings, 'TMDB_POOL_SIZE', 20),
+    timeout=getattr(settings, 'TMDB_TIMEOUT', 10.0),
+    retries=getattr(settings, 'TMDB_RETRIES', 3),
+)
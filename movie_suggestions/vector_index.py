@@ -0,0 +1,155 @@
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from movie_suggestions.similarity_engine import UNKNOWN_DIRECTOR
+
+# Fixed-length vectors approximating MovieSimilarityGraph.calculate_similarity,
+# used to shortlist candidates that are then scored exactly. Sets (genres,
+# keywords, cast, director) are feature-hashed into fixed blocks, so no
+# vocabulary has to be kept. Numbers whose exact term falls off with their
+# difference (year, rating, popularity, runtime) are spread over overlapping
+# Gaussian bins, so that the dot product of two encodings also falls off with
+# the difference. Each block is scaled by the square root of its weight in the
+# exact scorer, so the dot product of two vectors roughly tracks their score.
+
+GENRE_DIMENSIONS = 32
+KEYWORD_DIMENSIONS = 128
+CAST_DIMENSIONS = 64
+DIRECTOR_DIMENSIONS = 32
+SYNOPSIS_DIMENSIONS = 64
+
+# (first centre, last centre, spacing and width) of each number's bins.
+YEAR_BINS = (1900, 2032, 4)
+RATING_BINS = (0, 10, 1)
+POPULARITY_BINS = (0, 200, 10)
+RUNTIME_BINS = (40, 240, 10)
+
+
+def _centres(bins) -> np.ndarray:
+    first, last, spacing = bins
+    return np.arange(first, last + spacing, spacing, dtype=np.float64)
+
+
+def vector_dimensions(mood_count: int) -> int:
+    return (GENRE_DIMENSIONS + KEYWORD_DIMENSIONS + CAST_DIMENSIONS + DIRECTOR_DIMENSIONS
+            + SYNOPSIS_DIMENSIONS + mood_count
+            + sum(len(_centres(bins)) for bins in (YEAR_BINS, RATING_BINS, POPULARITY_BINS, RUNTIME_BINS)))
+
+
+def _hashed(items: Dict[str, float], dimensions: int, signed: bool = True) -> np.ndarray:
+    # crc32 rather than hash(), which is salted per process. When signed, the
+    # top bit picks a sign so that colliding items tend to cancel out.
+    block = np.zeros(dimensions)
+    for item, value in items.items():
+        digest = zlib.crc32(item.encode('utf-8'))
+        block[digest % dimensions] += value if digest >> 31 or not signed else -value
+    return block
+
+
+def _scaled(block: np.ndarray, weight: float) -> np.ndarray:
+    norm = np.linalg.norm(block)
+    return block * (np.sqrt(weight) / norm) if norm else block
+
+
+def _binned(value: Optional[float], bins, weight: float) -> np.ndarray:
+    centres = _centres(bins)
+    if value is None:
+        return np.zeros(len(centres))
+    spacing = bins[2]
+    value = min(max(value, bins[0] - spacing), bins[1] + spacing)
+    return _scaled(np.exp(-0.5 * ((centres - value) / spacing) ** 2), weight)
+
+
+def movie_vector(movie: Dict, moods: Sequence[str], genre_hierarchy: Dict[str, List[str]]) -> np.ndarray:
+    genres = {}
+    for genre in movie['genres']:
+        for related in genre_hierarchy.get(genre, ()):
+            genres.setdefault(related, 0.5)
+    genres.update(dict.fromkeys(movie['genres'], 1.0))
+
+    cast = {}
+    for position, actor in enumerate(movie['cast']):
+        cast.setdefault(actor, 1 / (1 + position))
+
+    director = {} if movie['director'] == UNKNOWN_DIRECTOR else {movie['director']: 1.0}
+
+    synopsis = {}
+    for word in (movie.get('synopsis') or '').lower().split():
+        synopsis[word] = synopsis.get(word, 0.0) + 1.0
+
+    year = movie['year']
+    temporal_rating = movie['rating'] * 0.95 ** (2024 - year)
+
+    return np.concatenate([
+        _scaled(_hashed(genres, GENRE_DIMENSIONS), 3),
+        # Unnormalised, as the exact scorer counts shared keywords.
+        np.sqrt(2) * _hashed(dict.fromkeys(movie['keywords'], 1.0), KEYWORD_DIMENSIONS, signed=False),
+        _scaled(_hashed(cast, CAST_DIMENSIONS), 2),
+        _scaled(_hashed(director, DIRECTOR_DIMENSIONS), 2),
+        _scaled(_hashed(synopsis, SYNOPSIS_DIMENSIONS), 2),
+        np.sqrt(2) * np.array([movie['mood_scores'][mood] for mood in moods], dtype=np.float64),
+        _binned(year or None, YEAR_BINS, 1),
+        _binned(temporal_rating, RATING_BINS, 1),
+        _binned(movie['popularity'], POPULARITY_BINS, 1),
+        _binned(movie.get('runtime'), RUNTIME_BINS, 1),
+    ])
+
+
+class MovieVectorIndex:
+    # Rows of movie vectors, reused as movies are evicted. A query ranks every
+    # row by dot product: at the few thousand movies a graph holds, one
+    # matrix-vector product is cheap and, unlike hashing the vectors into
+    # buckets, misses nothing.
+    def __init__(self, moods: Sequence[str], genre_hierarchy: Dict[str, List[str]]):
+        self.moods = list(moods)
+        self.genre_hierarchy = genre_hierarchy
+        self.vectors = np.zeros((64, vector_dimensions(len(self.moods))), dtype=np.float32)
+        self.ids: List[Optional[int]] = []
+        self.rows: Dict[int, int] = {}
+        self.free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, movie_id: int) -> bool:
+        return movie_id in self.rows
+
+    def add(self, movie_id: int, movie: Dict):
+        self.remove(movie_id)
+        vector = movie_vector(movie, self.moods, self.genre_hierarchy)
+
+        if self.free:
+            row = self.free.pop()
+            self.ids[row] = movie_id
+        else:
+            row = len(self.ids)
+            self.ids.append(movie_id)
+            if row == len(self.vectors):
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+
+        self.rows[movie_id] = row
+        self.vectors[row] = vector
+
+    def remove(self, movie_id: int):
+        row = self.rows.pop(movie_id, None)
+        if row is None:
+            return
+        self.ids[row] = None
+        self.vectors[row] = 0
+        self.free.append(row)
+
+    def nearest(self, movie_id: int, limit: int) -> List[int]:
+        # Up to `limit` ids of other indexed movies, most similar first.
+        row = self.rows.get(movie_id)
+        limit = min(limit, len(self.rows) - 1)
+        if row is None or limit < 1:
+            return []
+
+        scores = self.vectors[:len(self.ids)] @ self.vectors[row]
+        scores[self.free] = -np.inf
+        scores[row] = -np.inf
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+        order = np.argsort(-scores[candidates], kind='stable')
+        return [self.ids[i] for i in candidates[order].tolist()]
@@ -1,23 +1,34 @@
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views import View
-import requests
-from myproject.settings import TMDB_API_KEY
 from movie_suggestions.data_structures import (
+    MovieSuggestion,
     movie_trie,
-    MovieSimilarityGraph,
     cache_manager,
+    get_shared_movie_graph,
+    normalize_key,
+    typo_budget,
 )
-from movie_suggestions.fetch_actors import actor_manager
+from movie_suggestions.concurrency import tmdb_single_flight
+from movie_suggestions.fetch_actors import ACTOR_MAX_AGE, AUTOCOMPLETE_LIMIT, get_actor_manager
+from movie_suggestions.movie_store import get_movie
+from movie_suggestions.recommendation_store import get_recommendation_store
+from movie_suggestions.tmdb_client import tmdb_client
 from concurrent.futures import ThreadPoolExecutor
-import time
+import threading
+
+RECOMMENDATION_FETCH_WORKERS = 8
+MOVIE_AUTOCOMPLETE_LIMIT = 10
 
 
 class SearchActorsView(View):
     def get(self, request):
         prefix = request.GET.get("prefix", "")
-        results = actor_manager.search_actors(prefix)
-        formatted_results = [(actor.title(), movies) for actor, movies in results]
+        actor_manager = get_actor_manager()
+        results = actor_manager.search_actors(prefix, limit=AUTOCOMPLETE_LIMIT)
+        formatted_results = [
+            (actor.name, actor_manager.actor_movies.get(actor.id, [])) for actor in results
+        ]
         return JsonResponse({"suggestions": formatted_results})
 
 class FetchMovieDetails(View):
@@ -31,87 +42,139 @@ class FetchMovieDetails(View):
 
     @staticmethod
     def fetch_movie_details(movie_id):
-        cache_key = f"movie_details_{movie_id}"
-        movie_details = cache_manager.movie_cache.get(cache_key)
-
-        if movie_details:
-            return movie_details
-
-        movie_url = (
-            f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={TMDB_API_KEY}"
-        )
-        credits_url = f"https://api.themoviedb.org/3/movie/{movie_id}/credits?api_key={TMDB_API_KEY}"
-
-        try:
-            movie_response = requests.get(movie_url)
-            credits_response = requests.get(credits_url)
-            if (
-                movie_response.status_code == 200
-                and credits_response.status_code == 200
-            ):
-                movie_data = movie_response.json()
-                credits_data = credits_response.json()
-                director = next(
-                    (
-                        crew["name"]
-                        for crew in credits_data["crew"]
-                        if crew["job"] == "Director"
-                    ),
-                    "N/A",
-                )
-                cast = [actor["name"] for actor in credits_data["cast"][:5]]
-                movie_details = {
-                    "title": movie_data["title"],
-                    "overview": movie_data["overview"],
-                    "poster_path": f"https://image.tmdb.org/t/p/w500{movie_data['poster_path']}",
-                    "release_date": movie_data["release_date"],
-                    "vote_average": movie_data["vote_average"],
-                    "genres": [genre["name"] for genre in movie_data["genres"]],
-                    "runtime": movie_data["runtime"],
-                    "director": director,
-                    "cast": cast,
-                    "budget": movie_data["budget"],
-                    "revenue": movie_data["revenue"],
-                }
-                cache_manager.movie_cache.put(cache_key, movie_details)
-                return movie_details
-        except Exception as e:
-            print(f"Error fetching movie details: {e}")
-        return None
+        movie = get_movie(movie_id)
+        if movie is None:
+            return None
+        return {
+            "title": movie.title,
+            "overview": movie.overview,
+            "poster_path": (
+                f"https://image.tmdb.org/t/p/w500{movie.poster_path}" if movie.poster_path else None
+            ),
+            "release_date": movie.release_date or "",
+            "vote_average": movie.vote_average,
+            "genres": list(movie.genres),
+            "runtime": movie.runtime,
+            "director": movie.director or "N/A",
+            "cast": list(movie.cast[:5]),
+            "budget": movie.budget,
+            "revenue": movie.revenue,
+        }
 
 class GetMovieAutocomplete(View):
+    index_lock = threading.Lock()
+
     def get(self, request):
         query = request.GET.get("query", "")
         if query:
+            # Typing-as-you-search is answered from titles already seen once
+            # movie_trie holds enough matches; TMDB is only asked otherwise.
+            local_titles = self.local_suggestions(query)
+            if len(local_titles) >= MOVIE_AUTOCOMPLETE_LIMIT:
+                return JsonResponse({"suggestions": local_titles})
+
             cache_key = f"search_{query}"
-            cached_results = cache_manager.search_cache.get(cache_key)
+            cached_results = cache_manager.search_cache.get_or_refresh(
+                cache_key, self.search_titles, query, cache_key
+            )
             if cached_results:
                 return JsonResponse({"suggestions": cached_results})
 
-            suggestions = self.fetch_movies(query)
-            for movie in suggestions:
-                movie_trie.insert(movie["title"])
-            movie_titles = [
-                {
-                    "title": movie["title"],
-                    "year": movie["release_date"][:4],
-                    "id": movie["id"],
-                }
-                for movie in suggestions
-            ]
-
-            cache_manager.search_cache.put(cache_key, movie_titles)
+            movie_titles = self.search_titles(query, cache_key, local_titles)
         else:
             movie_titles = []
         return JsonResponse({"suggestions": movie_titles})
 
+    def search_titles(self, query, cache_key, local_titles=None):
+        if local_titles is None:
+            local_titles = self.local_suggestions(query)
+        suggestions = self.fetch_movies(query)
+        self.index_movies(suggestions)
+        movie_titles = [
+            {
+                "title": movie["title"],
+                "year": (movie.get("release_date") or "")[:4],
+                "id": movie["id"],
+            }
+            for movie in suggestions
+        ]
+        returned_ids = {movie["id"] for movie in movie_titles}
+        movie_titles.extend(
+            movie for movie in local_titles if movie["id"] not in returned_ids
+        )
+        # Misspelled queries rarely match on TMDB; offer known titles a
+        # typo or two away instead.
+        if len(movie_titles) < MOVIE_AUTOCOMPLETE_LIMIT:
+            returned_ids = {movie["id"] for movie in movie_titles}
+            movie_titles.extend(
+                movie for movie in self.fuzzy_suggestions(query)
+                if movie["id"] not in returned_ids
+            )
+        movie_titles = movie_titles[:MOVIE_AUTOCOMPLETE_LIMIT]
+
+        cache_manager.search_cache.put(cache_key, movie_titles)
+        return movie_titles
+
+    @staticmethod
+    def local_suggestions(query, limit=MOVIE_AUTOCOMPLETE_LIMIT):
+        key = normalize_key(query)
+        # Queries of punctuation only would otherwise match every title.
+        if not key:
+            return []
+        movies = []
+        for _, payload in movie_trie.search_prefix_items(key, limit):
+            movies.extend(payload.values())
+        movies.sort(key=lambda movie: movie.popularity, reverse=True)
+        return [
+            {"title": movie.title, "year": movie.year, "id": movie.id}
+            for movie in movies[:limit]
+        ]
+
+    @staticmethod
+    def fuzzy_suggestions(query, limit=MOVIE_AUTOCOMPLETE_LIMIT):
+        query = normalize_key(query)
+        max_distance = typo_budget(query)
+        if not max_distance:
+            return []
+        movies = []
+        for title in movie_trie.fuzzy_search(query, max_distance, limit):
+            movies.extend(sorted(
+                movie_trie.get(title).values(), key=lambda movie: movie.popularity, reverse=True
+            ))
+        return [
+            {"title": movie.title, "year": movie.year, "id": movie.id}
+            for movie in movies[:limit]
+        ]
+
+    @classmethod
+    def index_movies(cls, movies):
+        # Titles are keyed by normalize_key (case, accents and punctuation
+        # folded); each key holds every movie sharing that title and ranks by
+        # the most popular of them.
+        with cls.index_lock:
+            for movie in movies:
+                key = normalize_key(movie["title"])
+                if not key:
+                    continue
+                suggestion = MovieSuggestion(
+                    id=movie["id"],
+                    title=movie["title"],
+                    year=(movie.get("release_date") or "")[:4],
+                    popularity=movie.get("popularity") or 0.0,
+                )
+                payload = dict(movie_trie.get(key) or {})
+                payload[suggestion.id] = suggestion
+                movie_trie.insert(
+                    key, max(entry.popularity for entry in payload.values()), payload
+                )
+
     @staticmethod
     def fetch_movies(movie_name):
-        url = f"https://api.themoviedb.org/3/search/movie?query={movie_name}&language=en-US&api_key={TMDB_API_KEY}"
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                movie_data = response.json()
+            movie_data = tmdb_client.get_json(
+                "/search/movie", {"query": movie_name, "language": "en-US"}
+            )
+            if movie_data:
                 return movie_data["results"]
         except Exception as e:
             print(f"Error fetching movie data: {e}")
@@ -125,12 +188,12 @@ class GetActorAutocomplete(View):
         if not query:
             return JsonResponse({"suggestions": []})
             
-        results = actor_manager.search_actors(query)
+        results = get_actor_manager().search_actors(query, limit=AUTOCOMPLETE_LIMIT)
         
         suggestions = [{
-            "name": actor[0].title(),
-            "id": None,  
-            "known_for": actor[1][:3] if actor[1] else [] 
+            "name": actor.name,
+            "id": actor.id,
+            "known_for": list(actor.known_for[:3]),
         } for actor in results]
         
         return JsonResponse({
@@ -142,7 +205,7 @@ class GetActorMovies(View):
     def get(self, request):
         actor_name = request.GET.get("actor_name", "").lower()
         try:
-            movies = actor_manager.get_actor_movies(actor_name)
+            movies = get_actor_manager().get_actor_movies(actor_name)
             movie_details = []
             with ThreadPoolExecutor() as executor:
                 futures = [
@@ -169,36 +232,52 @@ class GetActorDetails(View):
             return JsonResponse({"error": "Actor name is required"}, status=400)
 
         cache_key = f"actor_details_{actor_name}"
-        cached_details = cache_manager.actor_cache.get(cache_key)
+        # A background refresh goes to TMDB rather than to the actor manager's
+        # copy, which is as old as the cached response.
+        cached_details = cache_manager.actor_cache.get_or_refresh(
+            cache_key, self.fetch_actor_details, actor_name, cache_key, True
+        )
         if cached_details:
             return JsonResponse(cached_details)
 
-        print(f"Searching for actor: {actor_name}")
-
-        search_url = f"https://api.themoviedb.org/3/search/person?query={actor_name}&api_key={TMDB_API_KEY}"
-        response = requests.get(search_url)
-        data = response.json()
+        response_data = tmdb_single_flight.do(
+            cache_key, self.fetch_actor_details, actor_name, cache_key
+        )
+        return JsonResponse(response_data)
 
-        if data.get("results"):
-            actor_id = data["results"][0]["id"]
-            details_url = f"https://api.themoviedb.org/3/person/{actor_id}?append_to_response=movie_credits&api_key={TMDB_API_KEY}"
-            details_response = requests.get(details_url)
-            actor_details = details_response.json()
+    @staticmethod
+    def fetch_actor_details(actor_name, cache_key, refresh=False):
+        # Actors the actor index knows are served from the actor manager; only
+        # other names are searched on TMDB, and the person found is added to
+        # the index under their also_known_as names as well.
+        actor_manager = get_actor_manager()
+        actor = actor_manager.get_actor_details(actor_name, max_age=0 if refresh else ACTOR_MAX_AGE)
+        if actor is None:
+            print(f"Searching for actor: {actor_name}")
+            data = tmdb_client.get_json("/search/person", {"query": actor_name}) or {}
+            if data.get("results"):
+                actor_id = data["results"][0]["id"]
+                person = tmdb_client.get_json(
+                    f"/person/{actor_id}", {"append_to_response": "movie_credits"}
+                )
+                if person and "id" in person:
+                    actor = actor_manager.add_actor_details(person)
 
+        if actor:
             response_data = {
                 "success": True,
                 "actor": {
-                    "name": actor_details["name"],
-                    "birthday": actor_details.get("birthday"),
-                    "place_of_birth": actor_details.get("place_of_birth"),
+                    "name": actor["name"],
+                    "birthday": actor.get("birthday"),
+                    "place_of_birth": actor.get("place_of_birth"),
                     "profile_path": (
-                        f"https://image.tmdb.org/t/p/w500{actor_details['profile_path']}"
-                        if actor_details.get("profile_path")
+                        f"https://image.tmdb.org/t/p/w500{actor['profile_path']}"
+                        if actor.get("profile_path")
                         else None
                     ),
-                    "known_for_department": actor_details.get("known_for_department"),
-                    "also_known_as": actor_details.get("also_known_as", []),
-                    "popularity": actor_details.get("popularity"),
+                    "known_for_department": actor.get("known_for_department"),
+                    "also_known_as": actor.get("also_known_as") or [],
+                    "popularity": actor.get("popularity"),
                     "movies": [
                         {
                             "id": movie["id"],
@@ -211,18 +290,16 @@ class GetActorDetails(View):
                                 else None
                             ),
                         }
-                        for movie in actor_details.get("movie_credits", {}).get(
-                            "cast", []
-                        )
+                        for movie in actor["movies"]
                     ],
                 },
             }
 
             cache_manager.actor_cache.put(cache_key, response_data)
-            return JsonResponse(response_data)
+            return response_data
         else:
             print("No results found for actor.")
-            return JsonResponse({"success": False, "error": "Actor not found"})
+            return {"success": False, "error": "Actor not found"}
 
 class MovieRecommendationsView(View):
     def get(self, request):
@@ -231,44 +308,64 @@ class MovieRecommendationsView(View):
             return JsonResponse({"success": False, "message": "Movie ID is required"})
 
         cache_key = f"recommendations_{movie_id}"
-        cached_recommendations = cache_manager.similarity_cache.get(cache_key)
+        # A background refresh recomputes the list rather than re-reading the
+        # graph's cached copy of it.
+        cached_recommendations = cache_manager.similarity_cache.get_or_refresh(
+            cache_key, self.compute_recommendations, movie_id, cache_key, True
+        )
         if cached_recommendations:
             return JsonResponse(cached_recommendations)
 
+        # Lists computed offline by the precompute_recommendations command.
+        if movie_id.isdigit():
+            precomputed = get_recommendation_store().get(int(movie_id))
+            if precomputed:
+                cache_manager.similarity_cache.put(cache_key, precomputed)
+                return JsonResponse(precomputed)
+
+        response_data = tmdb_single_flight.do(
+            cache_key, self.compute_recommendations, movie_id, cache_key
+        )
+        return JsonResponse(response_data)
+
+    def compute_recommendations(self, movie_id, cache_key, refresh=False):
         try:
-            graph = MovieSimilarityGraph()
+            graph = get_shared_movie_graph()
 
-            movie_details = self.fetch_movie_details(movie_id)
-            if not movie_details:
-                return JsonResponse({"success": False, "message": "Movie not found"})
-
-            self.add_movie_to_graph(graph, movie_details)
-
-            recommended = self.fetch_recommendations(movie_id)
-            for rec in recommended[:20]:
-                rec_details = self.fetch_movie_details(rec["id"])
-                if rec_details:
-                    self.add_movie_to_graph(graph, rec_details)
-                    time.sleep(0.25)  
-
-            similar = self.fetch_similar_movies(movie_id)
-            for sim in similar[:20]:
-                sim_details = self.fetch_movie_details(sim["id"])
-                if sim_details:
-                    self.add_movie_to_graph(graph, sim_details)
-                    time.sleep(0.25)
-
-            director = self.get_director(movie_details)
-            if director:
-                director_movies = self.search_movies(director)
-                for movie in director_movies[:10]:
-                    dir_movie_details = self.fetch_movie_details(movie["id"])
-                    if dir_movie_details:
-                        self.add_movie_to_graph(graph, dir_movie_details)
-                        time.sleep(0.25)
+            seed = get_movie(movie_id)
+            if seed is None:
+                return {"success": False, "message": "Movie not found"}
+
+            self.add_movie_to_graph(graph, seed)
+
+            director = seed.director
+            with ThreadPoolExecutor(max_workers=RECOMMENDATION_FETCH_WORKERS) as executor:
+                recommended = executor.submit(self.fetch_recommendations, movie_id)
+                similar = executor.submit(self.fetch_similar_movies, movie_id)
+                director_movies = (
+                    executor.submit(self.search_movies, director) if director else None
+                )
+
+                candidate_ids = []
+                seen = set()
+                for movies, count in (
+                    (recommended.result(), 20),
+                    (similar.result(), 20),
+                    (director_movies.result() if director_movies else [], 10),
+                ):
+                    for movie in movies[:count]:
+                        if movie["id"] in seen:
+                            continue
+                        seen.add(movie["id"])
+                        if not graph.touch(movie["id"]):
+                            candidate_ids.append(movie["id"])
+
+                for candidate in executor.map(get_movie, candidate_ids):
+                    if candidate:
+                        self.add_movie_to_graph(graph, candidate)
 
             graph.build_graph()
-            recommendations = graph.get_recommendations(int(movie_id))
+            recommendations = graph.get_recommendations(int(movie_id), use_cache=not refresh)
 
             if recommendations:
                 response_data = {
@@ -288,117 +385,55 @@ class MovieRecommendationsView(View):
                 }
 
                 cache_manager.similarity_cache.put(cache_key, response_data)
-                return JsonResponse(response_data)
-            return JsonResponse(
-                {"success": False, "message": "No recommendations found"}
-            )
-
-        except Exception as e:
-            return JsonResponse({"success": False, "message": str(e)})
+                return response_data
+            return {"success": False, "message": "No recommendations found"}
 
-    def fetch_movie_details(self, movie_id):
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}"
-        params = {
-            "api_key": TMDB_API_KEY,
-            "language": "en-US",
-            "append_to_response": "credits,keywords",
-        }
-        try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return response.json()
-            return None
         except Exception as e:
-            print(f"Error fetching movie details: {e}")
-            return None
+            return {"success": False, "message": str(e)}
 
     def fetch_recommendations(self, movie_id):
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}/recommendations"
-        params = {"api_key": TMDB_API_KEY, "language": "en-US", "page": 1}
+        params = {"language": "en-US", "page": 1}
         try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return response.json().get("results", [])
-            return []
+            data = tmdb_client.get_json(f"/movie/{movie_id}/recommendations", params)
+            return data.get("results", []) if data else []
         except Exception:
             return []
 
     def fetch_similar_movies(self, movie_id):
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}/similar"
-        params = {"api_key": TMDB_API_KEY, "language": "en-US", "page": 1}
+        params = {"language": "en-US", "page": 1}
         try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return response.json().get("results", [])
-            return []
+            data = tmdb_client.get_json(f"/movie/{movie_id}/similar", params)
+            return data.get("results", []) if data else []
         except Exception:
             return []
 
     def search_movies(self, query):
-        url = f"https://api.themoviedb.org/3/search/movie"
         params = {
-            "api_key": TMDB_API_KEY,
             "language": "en-US",
             "query": query,
             "page": 1,
             "include_adult": False,
         }
         try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return response.json().get("results", [])
-            return []
+            data = tmdb_client.get_json("/search/movie", params)
+            return data.get("results", []) if data else []
         except Exception:
             return []
 
-    def get_director(self, movie_details):
-        try:
-            return next(
-                (
-                    crew["name"]
-                    for crew in movie_details.get("credits", {}).get("crew", [])
-                    if crew["job"] == "Director"
-                ),
-                None,
-            )
-        except Exception:
-            return None
-
-    def add_movie_to_graph(self, graph, movie_details):
-        if not movie_details:
-            return
+    def add_movie_to_graph(self, graph, movie):
         try:
-            director = self.get_director(movie_details) or "Unknown Director"
-
-            cast = [
-                c["name"]
-                for c in movie_details.get("credits", {}).get("cast", [])
-                if c.get("order", 10) < 5
-            ]
-
-            keywords = [
-                kw["name"]
-                for kw in movie_details.get("keywords", {}).get("keywords", [])
-            ]
-
-            year = (
-                int(movie_details.get("release_date", "").split("-")[0])
-                if movie_details.get("release_date", "")
-                else 0
-            )
-
             graph.add_movie(
-                movie_id=movie_details["id"],
-                title=movie_details.get("title", "Unknown Title"),
-                genres=[g["name"] for g in movie_details.get("genres", [])],
-                cast=cast,
-                director=director,
-                year=year,
-                rating=movie_details.get("vote_average", 0.0),
-                popularity=movie_details.get("popularity", 0.0),
-                keywords=keywords,
-                poster_path=movie_details.get("poster_path"),  
-                release_date=movie_details.get("release_date"),  
+                movie_id=movie.id,
+                title=movie.title,
+                genres=list(movie.genres),
+                cast=list(movie.cast[:5]),
+                director=movie.director or "Unknown Director",
+                year=movie.year or 0,
+                rating=movie.vote_average,
+                popularity=movie.popularity,
+                keywords=list(movie.keywords),
+                poster_path=movie.poster_path,
+                release_date=movie.release_date,
             )
         except Exception as e:
             print(f"Error adding movie to graph: {e}")